@@ -0,0 +1,152 @@
+"""Yol ağı cache'ini uygulama dışında, önceden üretir.
+
+Kullanım:
+    python build_graph.py --input bolu.osm
+    python build_graph.py --input bolu.osm.pbf --output /srv/hts/bolu_graph_cache.bin
+    python build_graph.py --input bolu_drive.graphml
+    python build_graph.py --download
+    python build_graph.py --input bolu_ili.osm.pbf --tiles graph_tiles --tile-size 0.05
+    python build_graph.py --benchmark 200 --output /srv/hts/bolu_graph_cache.bin
+
+Uygulama ``HTS_OFFLINE=1`` ortam değişkeniyle çalıştırıldığında hiçbir
+şey indirmez; cache'in bu araçla hazırlanmış olması gerekir.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from graph_builder import (
+    GRAPH_CACHE_FILE, TILE_DIR, build_graph_from_file, download_graph, download_graph_by_place
+)
+from road_graph import CompactGraph
+from road_tiles import DEFAULT_TILE_SIZE, write_tiles
+from routing import astar_search, route_length, shortest_path
+from graph_simplify import describe
+from graph_download import DEFAULT_RETRIES, DEFAULT_TIMEOUT, download
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Hırsız Takip Sistemi yol ağı cache'ini üretir")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="Yerel .osm / .osm.xml / .pbf veya .graphml dosyası")
+    source.add_argument("--download", action="store_true",
+                        help="Ağı Overpass'tan indir (uygulamanın ilk açılıştaki davranışı)")
+    source.add_argument("--benchmark", type=int, metavar="N",
+                        help="Cache üretmek yerine --output cache'inde N rastgele düğüm çifti için "
+                             "A* ile Dijkstra'nın genişlettiği düğüm sayılarını karşılaştır")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"--download: deneme başına zaman aşımı, sn (varsayılan: {DEFAULT_TIMEOUT:.0f})")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help=f"--download: yöntem başına deneme sayısı (varsayılan: {DEFAULT_RETRIES})")
+    parser.add_argument("--output", default=GRAPH_CACHE_FILE,
+                        help=f"Yazılacak cache dosyası (varsayılan: {GRAPH_CACHE_FILE})")
+    parser.add_argument("--tiles", nargs="?", const=TILE_DIR, default=None,
+                        help=f"Tek dosya yerine karolara bölüp bu dizine yaz (varsayılan: {TILE_DIR}); "
+                             "girdi Bolu bbox'ına kırpılmaz")
+    parser.add_argument("--tile-size", type=float, default=DEFAULT_TILE_SIZE,
+                        help=f"Karo boyutu, derece (varsayılan: {DEFAULT_TILE_SIZE})")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="--benchmark: rastgele çiftler için tohum (varsayılan: 0)")
+    return parser.parse_args(argv)
+
+
+def benchmark(path: str, pairs: int, seed: int = 0) -> int:
+    """Cache'teki graf üzerinde rota yöntemlerini uygulamadaki çağrıyla (``shortest_path``) karşılaştırır
+
+    Süreler ``shortest_path`` üzerinden ölçülür, yani Dijkstra uygulamanın kullandığı
+    SciPy Dijkstra'sıdır. Genişletilen düğüm sayıları aynı Python döngüsünün
+    sezgisiz (hedefte duran Dijkstra) ve sezgili (A*) çalışmasından gelir.
+    """
+    try:
+        graph = CompactGraph.load(path)
+    except Exception as e:
+        print(f"{path} açılamadı: {e}", file=sys.stderr)
+        return 1
+    if graph.num_nodes < 2:
+        print("Karşılaştırma için grafta yeterli düğüm yok.", file=sys.stderr)
+        return 1
+
+    methods = [("dijkstra", "Dijkstra"), ("astar", "A*")]
+    rng = np.random.default_rng(seed)
+    pair_list = rng.integers(0, graph.num_nodes, size=(pairs, 2)).tolist()
+    # Türetilmiş yapılar (SciPy matrisi, arama listeleri) ölçüme girmesin
+    node_ids = graph.node_ids.tolist()
+    for method, _ in methods:
+        shortest_path(graph, node_ids[0], node_ids[-1], method)
+
+    seconds = {method: 0.0 for method, _ in methods}
+    expanded = {"dijkstra": 0, "astar": 0}
+    found = mismatched = 0
+    for source, target in pair_list:
+        lengths = {}
+        for method, _ in methods:
+            started = time.perf_counter()
+            route = shortest_path(graph, node_ids[source], node_ids[target], method)
+            seconds[method] += time.perf_counter() - started
+            lengths[method] = None if route is None else route_length(graph, route)
+        for method, heuristic in (("dijkstra", False), ("astar", True)):
+            expanded[method] += astar_search(graph, source, target, heuristic=heuristic)[1]
+        if lengths["dijkstra"] is not None:
+            found += 1
+            if any(length is None or abs(lengths["dijkstra"] - length) > 1e-3 * max(lengths["dijkstra"], 1.0)
+                   for length in lengths.values()):
+                mismatched += 1
+
+    print(f"{graph.num_nodes} düğüm, {graph.num_edges} kenar; {pairs} çift ({found} tanesinde yol var)")
+    for method, label in methods:
+        print(f"  {label:<9} ortalama {seconds[method] / pairs * 1000:8.2f} ms")
+    if expanded["astar"]:
+        print(f"  Genişletilen düğüm: hedefte duran Dijkstra {expanded['dijkstra'] / pairs:.1f}, "
+              f"A* {expanded['astar'] / pairs:.1f} ({expanded['dijkstra'] / expanded['astar']:.1f} kat az)")
+    if mismatched:
+        print(f"  UYARI: {mismatched} çiftte rota uzunlukları farklı", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.benchmark is not None:
+        return benchmark(args.output, args.benchmark, args.seed)
+    started = time.perf_counter()
+
+    try:
+        if args.input:
+            print(f"{args.input} okunuyor...")
+            graph = build_graph_from_file(args.input, clip=args.tiles is None)
+        else:
+            print("Yol ağı indiriliyor...")
+            graph = download(
+                [("Bbox sorgusu", download_graph), ("Şehir ismiyle sorgu", download_graph_by_place)],
+                timeout=args.timeout, retries=args.retries,
+                on_event=lambda kind, message, progress: print(f"  [{kind}] {message}")
+            )
+    except Exception as e:
+        print(f"Yol ağı üretilemedi: {e}", file=sys.stderr)
+        return 1
+
+    if graph.num_nodes == 0:
+        print("Kaynakta sürülebilir yol bulunamadı, cache yazılmadı.", file=sys.stderr)
+        return 1
+
+    if graph.metadata.get("simplify"):
+        print(f"Sadeleştirme: {describe(graph.metadata['simplify'])}")
+
+    if args.tiles:
+        tiles = write_tiles(graph, args.tiles, args.tile_size)
+        elapsed = time.perf_counter() - started
+        print(f"{graph.num_nodes} düğüm, {graph.num_edges} kenar -> {len(tiles)} karo, "
+              f"{args.tiles}/ ({elapsed:.1f} sn)")
+        return 0
+
+    graph.save(args.output)
+    elapsed = time.perf_counter() - started
+    print(f"{graph.num_nodes} düğüm, {graph.num_edges} kenar -> {args.output} "
+          f"({graph.nbytes / 1024:.1f} KB, {elapsed:.1f} sn)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
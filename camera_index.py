@@ -0,0 +1,100 @@
+"""Graf düğümü/kenarı -> kameralar ters indeksi.
+
+Kameralar adlarıyla (benzersizdir) tutulur. İndeks kamera eklendikçe ve
+silindikçe artımlı güncellenir, kamera dosyasının yanına ayrı bir JSON
+dosyası olarak kaydedilir. Dosyadaki özet kamera listesiyle tutmazsa (dosya
+elle düzenlenmiş, eski sürüm vb.) indeks kameralardan yeniden kurulur.
+
+Bir rotaya veya alt grafa düşen kameralar, rotanın düğüm/kenar kümesiyle
+indeks anahtarlarının kesişimidir.
+"""
+import hashlib
+import json
+import os
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Sequence, Set, Tuple
+
+Camera = Dict[str, Any]
+EdgeKey = Tuple[int, int]
+
+
+def edge_key(source: int, target: int) -> EdgeKey:
+    """Kenarın yönsüz anahtarı (iki yönlü yolda iki yön aynı kenardır)"""
+    return (source, target) if source <= target else (target, source)
+
+
+def cameras_digest(cameras: Sequence[Camera]) -> str:
+    """İndeksin hangi kamera listesine ait olduğunu gösteren özet"""
+    keys = [[cam.get('name'), cam.get('node_id'), cam.get('edge') if cam.get('snap') == "edge" else None]
+            for cam in cameras]
+    return hashlib.sha256(json.dumps(keys, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class CameraIndex:
+    """Düğüm -> kamera adları ve (yönsüz) kenar -> kenara oturtulmuş kamera adları"""
+
+    def __init__(self):
+        self.by_node: Dict[int, Set[str]] = defaultdict(set)
+        self.by_edge: Dict[EdgeKey, Set[str]] = defaultdict(set)
+
+    @classmethod
+    def from_cameras(cls, cameras: Iterable[Camera]) -> "CameraIndex":
+        index = cls()
+        for camera in cameras:
+            index.add(camera)
+        return index
+
+    def add(self, camera: Camera) -> None:
+        name = camera['name']
+        if camera.get('node_id') is not None:
+            self.by_node[camera['node_id']].add(name)
+        if camera.get('snap') == "edge" and camera.get('edge'):
+            self.by_edge[edge_key(*camera['edge'])].add(name)
+
+    def remove(self, camera: Camera) -> None:
+        name = camera['name']
+        for table, key in ((self.by_node, camera.get('node_id')),
+                           (self.by_edge, edge_key(*camera['edge']) if camera.get('edge') else None)):
+            names = table.get(key)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del table[key]
+
+    def at_nodes(self, nodes: Iterable[int]) -> Set[str]:
+        """Verilen düğümlerden birine bağlı kameralar"""
+        return set().union(*(self.by_node[n] for n in self.by_node.keys() & set(nodes)))
+
+    def on_edges(self, pairs: Iterable[Tuple[int, int]]) -> Set[str]:
+        """Verilen kenarlardan (yön önemsiz) birine oturtulmuş kameralar"""
+        keys = {edge_key(u, v) for u, v in pairs}
+        return set().union(*(self.by_edge[k] for k in self.by_edge.keys() & keys))
+
+    def save(self, path: str, cameras: Sequence[Camera]) -> None:
+        data = {
+            "cameras": cameras_digest(cameras),
+            "by_node": {str(node): sorted(names) for node, names in self.by_node.items()},
+            "by_edge": {f"{u}_{v}": sorted(names) for (u, v), names in self.by_edge.items()},
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, cameras: Sequence[Camera]) -> "CameraIndex":
+        """Kayıtlı indeksi açar; yoksa, bozuksa veya kameralarla tutmuyorsa yeniden kurar"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("cameras") != cameras_digest(cameras):
+                return cls.from_cameras(cameras)
+            index = cls()
+            for node, names in data["by_node"].items():
+                index.by_node[int(node)] = set(names)
+            for key, names in data["by_edge"].items():
+                u, v = (int(part) for part in key.split("_"))
+                index.by_edge[(u, v)] = set(names)
+            return index
+        except Exception:
+            return cls.from_cameras(cameras)
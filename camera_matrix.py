@@ -0,0 +1,223 @@
+"""Kameralar arası en kısa yol uzunlukları matrisi.
+
+Her kamera çifti için yol ağı üzerindeki en kısa yol uzunluğu (metre)
+``float32`` bir kare matriste tutulur. Matris NumPy ``.npy`` dosyası olarak
+diske yazılır ve ``mmap`` ile açılır; yanındaki JSON dosyası satır/sütun
+sırasındaki kamera adlarını, eşlendikleri düğümleri ve matrisin hangi yol
+ağıyla (``graph_signature``) hesaplandığını tutar.
+
+Güncelleme artımlıdır: adı ve düğümü değişmeyen kameraların satır ve
+sütunları olduğu gibi kopyalanır, yalnızca yeni (ya da düğümü değişmiş)
+kameralar için hesap yapılır. Her yeni kamera için satır, kameradan tek
+kaynaklı bir Dijkstra ile; yol ağı yönlü olduğundan sütun, ters çevrilmiş
+graf üzerinde yine tek kaynaklı bir Dijkstra ile bulunur. Silinen kameranın
+satırı ve sütunu hesap yapılmadan düşer; yol ağı değişmişse matris baştan
+kurulur.
+
+Hesap ``MatrixJob`` ile arka plan iş parçacığında yapılır; süreç başına tek
+iş vardır ve tamamlanan matris tek bir atama ile eskisinin yerine geçer.
+"""
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from road_graph import CompactGraph
+
+# Kaynaklar küçük gruplar halinde çözülür: (grup, düğüm sayısı) boyutlu ara sonuç bellekte kalmasın
+_SOURCE_BATCH = 8
+
+# on_progress(tamamlanan kamera sayısı, hesaplanacak kamera sayısı)
+ProgressCallback = Callable[[int, int], None]
+
+
+def _meta_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".json"
+
+
+class CameraMatrix:
+    """Kamera adlarıyla satır/sütunlanmış en kısa yol uzunlukları (metre, yol yoksa inf)"""
+
+    def __init__(self, names: Sequence[str] = (), nodes: Sequence = (),
+                 signature: Optional[str] = None, distances: Optional[np.ndarray] = None):
+        self.names = list(names)
+        self.nodes = list(nodes)
+        self.signature = signature
+        self.distances = distances if distances is not None else np.zeros((0, 0), dtype=np.float32)
+        self.position = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def open(cls, path: str) -> "CameraMatrix":
+        """Kayıtlı matrisi ``mmap`` ile açar; yoksa veya okunamazsa boş matris döner"""
+        try:
+            with open(_meta_path(path), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            distances = np.load(path, mmap_mode='r')
+            if distances.shape != (len(meta["names"]), len(meta["names"])):
+                return cls()
+            return cls(meta["names"], meta["nodes"], meta.get("signature"), distances)
+        except Exception:
+            return cls()
+
+    def save(self, path: str) -> None:
+        """Matrisi ve kamera sırasını kaydeder (yeni dosyalar geçici addan yerine taşınır)"""
+        tmp_path = path + ".tmp.npy"
+        out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=self.distances.shape)
+        out[:] = self.distances
+        out.flush()
+        del out
+        os.replace(tmp_path, path)
+        meta_tmp = _meta_path(path) + ".tmp"
+        with open(meta_tmp, 'w', encoding='utf-8') as f:
+            json.dump({"names": self.names, "nodes": self.nodes, "signature": self.signature,
+                       "updated_at": time.time()}, f, ensure_ascii=False)
+        os.replace(meta_tmp, _meta_path(path))
+
+    def covers(self, names: Sequence[str], nodes: Sequence, signature: Optional[str]) -> bool:
+        """Matris bu kameraları bu düğümlerle ve bu yol ağıyla mı hesaplanmış"""
+        return self.signature == signature and self.names == list(names) and self.nodes == list(nodes)
+
+    def distance(self, source: str, target: str) -> Optional[float]:
+        """İki kamera arasındaki en kısa yol uzunluğu, metre (matriste yoksa None, yol yoksa inf)"""
+        i, j = self.position.get(source), self.position.get(target)
+        if i is None or j is None:
+            return None
+        return float(self.distances[i, j])
+
+    def table(self) -> List[Dict[str, object]]:
+        """Arayüz için satır başına kamera, hücrelerde kilometre (yol yoksa None)"""
+        km = np.asarray(self.distances, dtype=np.float64) / 1000
+        km = np.where(np.isfinite(km), np.round(km, 2), np.nan)
+        return [{"Kamera": name, **{other: (None if np.isnan(value) else float(value))
+                                    for other, value in zip(self.names, row.tolist())}}
+                for name, row in zip(self.names, km)]
+
+    def updated(self, graph: CompactGraph, names: Sequence[str], nodes: Sequence,
+                signature: Optional[str], on_progress: Optional[ProgressCallback] = None,
+                cancelled: Optional[threading.Event] = None) -> "CameraMatrix":
+        """Verilen kameralar için matrisin güncellenmiş kopyası; yalnızca yeni kameralar hesaplanır"""
+        names, nodes = list(names), list(nodes)
+        reuse = self.signature == signature
+        old = [self.position.get(name, -1) if reuse else -1 for name in names]
+        old = [i if i >= 0 and self.nodes[i] == node else -1 for i, node in zip(old, nodes)]
+        fresh = [k for k, i in enumerate(old) if i < 0]
+
+        n = len(names)
+        distances = np.full((n, n), np.inf, dtype=np.float32)
+        kept = np.array([k for k, i in enumerate(old) if i >= 0], dtype=np.int64)
+        if len(kept):
+            source_rows = np.array([old[k] for k in kept], dtype=np.int64)
+            distances[np.ix_(kept, kept)] = self.distances[np.ix_(source_rows, source_rows)]
+
+        if fresh:
+            index = np.array([graph.index_of(node) if node is not None else -1 for node in nodes], dtype=np.int64)
+            mapped = index >= 0
+            forward = graph.to_csr_matrix()
+            # Matris sıfırdan kuruluyorsa sütunlar satırlardan gelir, ters grafa gerek yoktur
+            backward = forward.T.tocsr() if len(kept) else None
+            done = 0
+            for start in range(0, len(fresh), _SOURCE_BATCH):
+                if cancelled is not None and cancelled.is_set():
+                    raise InterruptedError("Mesafe matrisi hesabı iptal edildi")
+                batch = [k for k in fresh[start:start + _SOURCE_BATCH] if mapped[k]]
+                if batch:
+                    rows = dijkstra(forward, directed=True, indices=index[batch])
+                    distances[np.ix_(batch, np.flatnonzero(mapped))] = rows[:, index[mapped]]
+                    if backward is not None:
+                        cols = dijkstra(backward, directed=True, indices=index[batch])
+                        distances[np.ix_(np.flatnonzero(mapped), batch)] = cols[:, index[mapped]].T
+                done += len(fresh[start:start + _SOURCE_BATCH])
+                if on_progress is not None:
+                    on_progress(done, len(fresh))
+        return CameraMatrix(names, nodes, signature, distances)
+
+
+class MatrixJob:
+    """Mesafe matrisini arka planda güncelleyen iş (süreç başına tek örnek)
+
+    ``matrix`` her zaman son tamamlanan matristir; güncelleme sürerken okuyanlar onu görür.
+    İş sürerken gelen istek sıraya alınır (yalnızca en sonuncusu) ve iş bitince çalışır;
+    istek başka bir yol ağı içinse süren iş iptal edilir. Bir yol ağında hata alınırsa
+    ``retry`` çağrılana ya da ağ değişene kadar o ağ için yeniden denenmez.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.matrix = CameraMatrix.open(path)
+        self.running = False
+        self.progress = 0.0
+        self.error: Optional[BaseException] = None
+        self.failed_signature: Optional[str] = None
+        self.last_seconds: Optional[float] = None
+        self.cancelled = threading.Event()
+        self._signature: Optional[str] = None
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def submit(self, graph: CompactGraph, names: Sequence[str], nodes: Sequence,
+               signature: Optional[str]) -> bool:
+        """Matris bu kameraları kapsamıyorsa güncellemeyi başlatır ya da sıraya alır
+
+        Bu yol ağında daha önce hata alınmışsa hiçbir şey yapmaz ve False döner.
+        """
+        request = (graph, list(names), list(nodes), signature)
+        with self._lock:
+            if signature == self.failed_signature:
+                return False
+            if self.running:
+                self._pending = request
+                if signature != self._signature:
+                    # Eski yol ağı için süren hesap artık işe yaramaz
+                    self.cancelled.set()
+            elif not self.matrix.covers(names, nodes, signature):
+                self._start(request)
+        return True
+
+    def cancel(self) -> None:
+        """Süren hesabı iptal eder, sıradaki isteği bırakır (ör. yol ağı yenilenirken)"""
+        with self._lock:
+            self._pending = None
+            if self.running:
+                self.cancelled.set()
+
+    def retry(self) -> None:
+        """Hata alınan yol ağı için yeniden denemeye izin verir"""
+        with self._lock:
+            self.failed_signature = None
+            self.error = None
+
+    def _start(self, request) -> None:
+        # Kilit tutulurken çağrılır
+        self.running = True
+        self.progress = 0.0
+        self.error = None
+        self.cancelled.clear()
+        self._signature = request[3]
+        threading.Thread(target=self._run, args=request, name="camera-matrix", daemon=True).start()
+
+    def _run(self, graph, names, nodes, signature) -> None:
+        started = time.perf_counter()
+        try:
+            def on_progress(done, total):
+                self.progress = done / total
+            matrix = self.matrix.updated(graph, names, nodes, signature, on_progress, self.cancelled)
+            matrix.save(self.path)
+            self.matrix = CameraMatrix.open(self.path)
+            self.last_seconds = time.perf_counter() - started
+        except InterruptedError:
+            pass
+        except BaseException as e:
+            self.error = e
+            self.failed_signature = signature
+        finally:
+            with self._lock:
+                pending, self._pending = self._pending, None
+                if (pending is not None and pending[3] != self.failed_signature
+                        and not self.matrix.covers(*pending[1:])):
+                    self._start(pending)
+                else:
+                    self.running = False
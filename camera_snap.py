@@ -0,0 +1,175 @@
+"""Kameraları yol ağına oturtma ve ağ değiştiğinde toplu yeniden eşleme.
+
+Her kamera hangi ağa göre eşlendiğini ``graph_version`` alanında (ağın
+imzası: cache özeti ya da karo dizininin özeti) saklar. Ağ yeniden
+üretildiğinde eski ``node_id``/``edge`` değerleri artık var olmayan
+düğümleri gösterebilir; ``resnap_cameras`` tüm kameraları kendi eşleme
+modlarıyla (düğüm/kenar) tek geçişte, vektörel indeks sorgularıyla yeniden
+eşler ve yer değiştiren ya da eşlenemeyen kameraları raporlar.
+"""
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from projection import graph_projection
+from road_tiles import TileStore, tile_key
+from spatial_index import edge_snap_index, node_index
+
+Camera = Dict[str, Any]
+
+
+def graph_signature(network) -> Optional[str]:
+    """Yol ağının (tek graf veya karo deposu) kamera eşlemeleri için imzası"""
+    if network is None:
+        return None
+    if isinstance(network, TileStore):
+        return network.signature[:16]
+    if network.checksum:
+        return network.checksum[:16]
+    return network.metadata.get("built_at")
+
+
+def snap_points(graph, lats, lons, modes: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+    """Noktaları verilen modlarla ("edge"/"node") toplu olarak eşler; eşlenemeyenler None"""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    edge_mode = np.asarray(modes) == "edge"
+    results: List[Optional[Dict[str, Any]]] = [None] * len(lats)
+
+    idx = np.flatnonzero(edge_mode)
+    if len(idx):
+        edges, offsets, distances = edge_snap_index(graph).snap_batch(lats[idx], lons[idx])
+        found = edges >= 0
+        sources = np.zeros(len(edges), dtype=np.int64)
+        targets = np.zeros(len(edges), dtype=np.int64)
+        sources[found] = graph.node_ids[np.searchsorted(graph.indptr, edges[found], side='right') - 1]
+        targets[found] = graph.node_ids[graph.indices[edges[found]]]
+        for i, ok, source, target, offset, distance in zip(
+                idx.tolist(), found.tolist(), sources.tolist(), targets.tolist(),
+                offsets.tolist(), distances.tolist()):
+            if ok:
+                results[i] = {
+                    # Rotalar düğümden başlar; kamera kenarın kendisine yakın ucuna bağlanır
+                    "node_id": source if offset <= 0.5 else target,
+                    "snap": "edge",
+                    "edge": [source, target],
+                    "edge_offset": round(offset, 6),
+                    "edge_distance": round(distance, 2)
+                }
+
+    idx = np.flatnonzero(~edge_mode)
+    if len(idx):
+        node_ids, distances = node_index(graph).nearest_batch(lats[idx], lons[idx])
+        for i, node_id, distance in zip(idx.tolist(), node_ids.tolist(), distances.tolist()):
+            if np.isfinite(distance):
+                results[i] = {"node_id": node_id, "snap": "node"}
+    return results
+
+
+def _edge_snapped(camera: Camera) -> bool:
+    """Kamera bir kenara oturtulmuş mu"""
+    return camera.get('snap') == "edge" and bool(camera.get('edge'))
+
+
+def camera_edge(graph, camera: Camera) -> int:
+    """Kameranın oturtulduğu kenarın bu ağdaki indeksi (kenar modu değilse veya kenar yoksa -1)"""
+    if graph is None or not _edge_snapped(camera):
+        return -1
+    return graph.edge_between(*camera['edge'])
+
+
+def camera_positions(graph, cameras: Sequence[Camera]) -> Tuple[np.ndarray, np.ndarray]:
+    """Kameraların yol üzerindeki konumlarının grafın UTM düzlemindeki (x, y) dizileri
+
+    Kenara oturtulmuş kameralar kenar üzerindeki noktalarıyla, diğerleri
+    düğümleriyle yer alır; ağda karşılığı olmayanlar NaN olur. Sonuç grafta,
+    son görülen kamera listesi için saklanır (salt okunur diziler); eşlemeler
+    değişmedikçe sonraki çağrılar yeniden hesap yapmaz.
+    """
+    if graph is None or not len(cameras):
+        return np.full(len(cameras), np.nan), np.full(len(cameras), np.nan)
+    key = tuple((cam.get('node_id'), tuple(cam['edge']) if _edge_snapped(cam) else None,
+                 cam.get('edge_offset', 0.0)) for cam in cameras)
+    # Graf tüm oturumlarca paylaşılır: tek kayıt tek atamayla değişir
+    slot = graph.derived("camera_positions", dict)
+    cached = slot.get("last")
+    if cached is not None and cached[0] == key:
+        return cached[1], cached[2]
+
+    x = np.full(len(cameras), np.nan)
+    y = np.full(len(cameras), np.nan)
+    pairs = [(i, cam['edge']) for i, cam in enumerate(cameras) if _edge_snapped(cam)]
+    edges = np.full(len(cameras), -1, dtype=np.int64)
+    if pairs:
+        on_edge, ends = zip(*pairs)
+        edges[list(on_edge)] = graph.edges_between([u for u, _ in ends], [v for _, v in ends])
+    on_edge = np.flatnonzero(edges >= 0)
+    if len(on_edge):
+        offsets = [cameras[i].get('edge_offset', 0.0) for i in on_edge.tolist()]
+        x[on_edge], y[on_edge] = edge_snap_index(graph).points_at(edges[on_edge], offsets)
+
+    nodes = graph.indices_of(cam.get('node_id') for cam in cameras)
+    on_node = np.flatnonzero((edges < 0) & (nodes >= 0))
+    projection = graph_projection(graph)
+    x[on_node], y[on_node] = projection.x[nodes[on_node]], projection.y[nodes[on_node]]
+    x.flags.writeable = y.flags.writeable = False
+    slot["last"] = (key, x, y)
+    return x, y
+
+
+def camera_groups(network, cameras: Sequence[Camera]) -> Iterator[Tuple[Any, List[int]]]:
+    """Kameraları eşlenecekleri graflara göre gruplar (karolu ağda karo başına bir grup)"""
+    if not isinstance(network, TileStore):
+        yield network, list(range(len(cameras)))
+        return
+    groups = defaultdict(list)
+    for i, camera in enumerate(cameras):
+        groups[tile_key(camera['y'], camera['x'], network.tile_size)].append(i)
+    for indices in groups.values():
+        yield network.graph_for_points([(cameras[i]['y'], cameras[i]['x']) for i in indices]), indices
+
+
+def needs_resnap(cameras: Iterable[Camera], signature: Optional[str]) -> bool:
+    """Başka bir ağa göre eşlenmiş kamera var mı"""
+    return signature is not None and any(cam.get('graph_version') != signature for cam in cameras)
+
+
+def resnap_cameras(cameras: Sequence[Camera], groups: Iterable[Tuple[Any, List[int]]],
+                   signature: Optional[str]) -> Tuple[List[Camera], Dict[str, Any]]:
+    """Kameraları kendi eşleme modlarıyla yeniden eşler; güncel liste ve (taşınan/başarısız) raporunu döner
+
+    Eşlenemeyen kameralar eski değerleriyle ve eski ``graph_version`` ile kalır.
+    """
+    started = time.perf_counter()
+    updated = [dict(cam) for cam in cameras]
+    snapped = np.zeros(len(cameras), dtype=bool)
+    moved = []
+
+    for graph, indices in groups:
+        if graph is None or not indices:
+            continue
+        snaps = snap_points(
+            graph,
+            [cameras[i]['y'] for i in indices],
+            [cameras[i]['x'] for i in indices],
+            [cameras[i].get('snap', "node") for i in indices]
+        )
+        for i, snap in zip(indices, snaps):
+            if snap is None:
+                continue
+            old = cameras[i]
+            if snap['node_id'] != old.get('node_id') or snap.get('edge') != old.get('edge'):
+                moved.append({"name": old['name'], "old_node": old.get('node_id'), "new_node": snap['node_id']})
+            updated[i].update(snap)
+            updated[i]['graph_version'] = signature
+            snapped[i] = True
+
+    report = {
+        "total": len(cameras),
+        "moved": moved,
+        "failed": [cameras[i]['name'] for i in np.flatnonzero(~snapped).tolist()],
+        "seconds": time.perf_counter() - started
+    }
+    return updated, report
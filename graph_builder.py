@@ -0,0 +1,129 @@
+"""Yol ağı cache'ini üreten yardımcılar (Streamlit'e bağımlı değildir).
+
+Hem uygulama (``main.py``) hem de çevrimdışı derleme aracı
+(``build_graph.py``) aynı ayarları ve üst veriyi buradan kullanır; böylece
+önceden üretilen cache uygulamanın beklediği cache ile birebir aynı olur.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import Any, Dict
+
+import osmnx as ox
+
+from road_graph import DEFAULT_SPEED_KPH, CompactGraph
+from graph_simplify import SIMPLIFY_PIPELINE, simplify_graph
+
+GRAPH_CACHE_FILE = "bolu_graph_cache.bin"
+
+# Karo dizini varsa uygulama tek bbox yerine karolu ağı kullanır
+TILE_DIR = "graph_tiles"
+MAX_RESIDENT_TILES = 16
+
+# Bolu merkez yol ağı sınırları (north, south, east, west) ve türü
+GRAPH_BBOX = (40.7450, 40.7350, 31.6100, 31.5950)
+GRAPH_PLACE = "Bolu, Turkey"
+NETWORK_TYPE = 'drive'
+
+# OSMnx'in 'drive' filtresinin dışarıda bıraktığı highway türleri; yerel
+# .osm dosyaları filtrelenmeden geldiği için aynı ayıklama burada yapılır
+_NON_DRIVE_HIGHWAYS = {
+    "abandoned", "bridleway", "bus_guideway", "construction", "corridor",
+    "cycleway", "elevator", "escalator", "footway", "path", "pedestrian",
+    "planned", "platform", "proposed", "raceway", "service", "steps", "track",
+}
+
+
+def graph_cache_metadata() -> Dict[str, Any]:
+    """Cache'in geçerli sayılması için başlıkta beklenen üst veri"""
+    return {
+        "bbox": list(GRAPH_BBOX),
+        "network_type": NETWORK_TYPE,
+        "pipeline": SIMPLIFY_PIPELINE,
+        "versions": {"osmnx": ox.__version__},
+    }
+
+
+def _to_cache_graph(nx_graph, source: str) -> CompactGraph:
+    """NetworkX grafını sıkıştırır, sadeleştirir ve cache üst verisini ekler"""
+    # maxspeed etiketi olmayan kenarlara yol türünün ortalama hızı atanır
+    nx_graph = ox.add_edge_speeds(nx_graph, fallback=DEFAULT_SPEED_KPH)
+    graph, stats = simplify_graph(CompactGraph.from_networkx(nx_graph))
+    graph.metadata = {
+        **graph_cache_metadata(),
+        "simplify": stats,
+        "source": source,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    return graph
+
+
+def download_graph() -> CompactGraph:
+    """Bbox içindeki yol ağını Overpass'tan indirir"""
+    north, south, east, west = GRAPH_BBOX
+    return _to_cache_graph(
+        ox.graph_from_bbox(north=north, south=south, east=east, west=west, network_type=NETWORK_TYPE),
+        source="overpass:bbox"
+    )
+
+
+def download_graph_by_place() -> CompactGraph:
+    """Bbox sorgusu başarısız olursa yol ağını yer adıyla indirir"""
+    return _to_cache_graph(
+        ox.graph_from_place(GRAPH_PLACE, network_type=NETWORK_TYPE),
+        source=f"overpass:place:{GRAPH_PLACE}"
+    )
+
+
+def _is_drive_edge(data: Dict[str, Any]) -> bool:
+    highway = data.get('highway')
+    values = highway if isinstance(highway, list) else [highway]
+    if any(value is None or value in _NON_DRIVE_HIGHWAYS for value in values):
+        return False
+    return data.get('motor_vehicle') != 'no' and data.get('access') != 'private'
+
+
+def _convert_pbf(pbf_path: str, workdir: str) -> str:
+    """.pbf dosyasını ``osmium`` ile OSMnx'in okuyabildiği .osm biçimine çevirir"""
+    if shutil.which("osmium") is None:
+        raise RuntimeError(
+            ".pbf okumak için 'osmium' (osmium-tool) gerekli; "
+            "dosyayı 'osmium cat girdi.pbf -o girdi.osm' ile .osm'e çevirebilirsiniz"
+        )
+    osm_path = os.path.join(workdir, "extract.osm")
+    subprocess.run(["osmium", "cat", pbf_path, "-o", osm_path, "--overwrite"], check=True)
+    return osm_path
+
+
+def build_graph_from_file(path: str, clip: bool = True) -> CompactGraph:
+    """Yerel .osm/.osm.xml, .pbf veya GraphML dosyasından cache grafı üretir
+
+    OSM özütlerinde 'drive' ağı dışındaki yollar ayıklanır; GraphML dosyasının zaten
+    istenen ağ türüyle kaydedildiği varsayılır. ``clip`` ise ağ Bolu bbox'ına kırpılır
+    (karolara bölünecek il/şehir ölçekli ağlarda kırpma kapatılır).
+    """
+    name = os.path.basename(path).lower()
+    north, south, east, west = GRAPH_BBOX
+
+    if name.endswith(".graphml"):
+        nx_graph = ox.load_graphml(path)
+        if clip:
+            nx_graph = ox.truncate.truncate_graph_bbox(nx_graph, north, south, east, west)
+        return _to_cache_graph(nx_graph, source=f"graphml:{os.path.basename(path)}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        xml_path = _convert_pbf(path, workdir) if name.endswith(".pbf") else path
+        nx_graph = ox.graph_from_xml(xml_path, simplify=False, retain_all=True)
+
+    nx_graph.remove_edges_from([
+        (u, v, k) for u, v, k, data in nx_graph.edges(keys=True, data=True)
+        if not _is_drive_edge(data)
+    ])
+    if clip:
+        nx_graph = ox.truncate.truncate_graph_bbox(nx_graph, north, south, east, west)
+    else:
+        nx_graph.remove_nodes_from([node for node, degree in nx_graph.degree() if degree == 0])
+    nx_graph = ox.simplify_graph(nx_graph)
+    return _to_cache_graph(nx_graph, source=f"osm:{os.path.basename(path)}")
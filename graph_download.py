@@ -0,0 +1,132 @@
+"""Yol ağını zaman aşımı, yeniden deneme ve iptal desteğiyle indiren boru hattı.
+
+OSMnx istekleri engelleyici (senkron) olduğundan her deneme bir iş
+parçacığı havuzunda çalıştırılır; bekleme ise ``asyncio`` üzerinden yapılır.
+Böylece:
+
+- her deneme ``timeout`` saniye ile sınırlanır (aynı süre OSMnx'in HTTP
+  zaman aşımına da verilir, arkada asılı kalan istek de kendiliğinden biter),
+- başarısız denemeler üstel bekleme (``backoff_base * 2**n``) ile tekrarlanır,
+- her adım ``on_event`` ile bildirilir ve arayüzde ilerleme olarak gösterilir,
+- ``cancel_event`` işaretlendiğinde bekleme hemen kesilir.
+
+Overpass ve Nominatim adresleri ``HTS_OVERPASS_URL`` / ``HTS_NOMINATIM_URL``
+ortam değişkenleriyle değiştirilebilir; yerel sahte bir Overpass sunucusuna
+karşı denemek için bunlar yeterlidir.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Sequence, Tuple
+
+import osmnx as ox
+
+DEFAULT_TIMEOUT = 90.0       # saniye, deneme başına
+DEFAULT_RETRIES = 3          # her yöntem için deneme sayısı
+DEFAULT_BACKOFF_BASE = 2.0   # saniye
+DEFAULT_BACKOFF_MAX = 30.0   # saniye
+_CANCEL_POLL = 0.2           # saniye
+
+# on_event(tür, mesaj, ilerleme) - tür: attempt | retry | failed | done | cancelled
+EventCallback = Callable[[str, str, Optional[float]], None]
+Attempt = Tuple[str, Callable[[], object]]
+
+
+class DownloadCancelled(Exception):
+    """İndirme kullanıcı tarafından iptal edildi"""
+
+
+class DownloadFailed(Exception):
+    """Tüm yöntemler ve denemeler başarısız oldu"""
+
+
+def configure_osmnx(timeout: float = DEFAULT_TIMEOUT) -> None:
+    """OSMnx'in HTTP zaman aşımını ve (varsa) özel Overpass/Nominatim adreslerini ayarlar"""
+    ox.settings.timeout = timeout
+    overpass_url = os.environ.get("HTS_OVERPASS_URL")
+    if overpass_url:
+        ox.settings.overpass_endpoint = overpass_url
+        # Sahte/yerel sunucularda /status uç noktası olmayabilir
+        ox.settings.overpass_rate_limit = False
+    nominatim_url = os.environ.get("HTS_NOMINATIM_URL")
+    if nominatim_url:
+        ox.settings.nominatim_endpoint = nominatim_url
+
+
+def backoff_delay(retry: int, base: float = DEFAULT_BACKOFF_BASE,
+                  maximum: float = DEFAULT_BACKOFF_MAX) -> float:
+    """``retry``. tekrar öncesi beklenecek süre (1, 2, 4... katı, üstten sınırlı)"""
+    return min(base * (2 ** (retry - 1)), maximum)
+
+
+async def _wait_or_cancel(awaitable, timeout: Optional[float], cancel_event: Optional[threading.Event]):
+    """Bekler; süre dolarsa ``asyncio.TimeoutError``, iptal edilirse ``DownloadCancelled``"""
+    task = asyncio.ensure_future(awaitable)
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            task.cancel()
+            raise DownloadCancelled("İndirme iptal edildi")
+        step = _CANCEL_POLL if deadline is None else min(_CANCEL_POLL, max(deadline - loop.time(), 0))
+        done, _ = await asyncio.wait({task}, timeout=step)
+        if done:
+            return task.result()
+        if deadline is not None and loop.time() >= deadline:
+            task.cancel()
+            raise asyncio.TimeoutError()
+
+
+async def download_async(attempts: Sequence[Attempt], *, timeout: float = DEFAULT_TIMEOUT,
+                         retries: int = DEFAULT_RETRIES, backoff_base: float = DEFAULT_BACKOFF_BASE,
+                         backoff_max: float = DEFAULT_BACKOFF_MAX,
+                         on_event: Optional[EventCallback] = None,
+                         cancel_event: Optional[threading.Event] = None):
+    """Yöntemleri sırayla, her birini ``retries`` kez deneyerek ilk başarılı sonucu döner"""
+    notify = on_event or (lambda kind, message, progress: None)
+    loop = asyncio.get_running_loop()
+    total = max(len(attempts) * retries, 1)
+    errors = []
+
+    # Zaman aşımına uğrayan istek arkada bitene kadar sürebilir; sonraki deneme onu
+    # beklemesin diye her deneme kendi iş parçacığını alır, havuz beklemeden kapatılır
+    executor = ThreadPoolExecutor(max_workers=total, thread_name_prefix="graph-download")
+    try:
+        for method_index, (label, fetch) in enumerate(attempts):
+            for attempt in range(1, retries + 1):
+                step = method_index * retries + attempt - 1
+                notify("attempt", f"{label}: deneme {attempt}/{retries}", step / total)
+                try:
+                    result = await _wait_or_cancel(loop.run_in_executor(executor, fetch), timeout, cancel_event)
+                    notify("done", f"{label}: indirildi", 1.0)
+                    return result
+                except DownloadCancelled:
+                    notify("cancelled", "İndirme iptal edildi", None)
+                    raise
+                except asyncio.TimeoutError:
+                    error = f"{timeout:g} sn içinde yanıt gelmedi"
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                errors.append(f"{label} #{attempt}: {error}")
+
+                if attempt < retries:
+                    delay = backoff_delay(attempt, backoff_base, backoff_max)
+                    notify("retry", f"{label}: {error} - {delay:g} sn sonra tekrar denenecek", None)
+                    try:
+                        await _wait_or_cancel(asyncio.sleep(delay), None, cancel_event)
+                    except DownloadCancelled:
+                        notify("cancelled", "İndirme iptal edildi", None)
+                        raise
+                else:
+                    notify("failed", f"{label}: {error}", None)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    raise DownloadFailed("; ".join(errors))
+
+
+def download(attempts: Sequence[Attempt], **kwargs):
+    """``download_async`` için senkron giriş noktası (arka plan iş parçacıklarından çağrılır)"""
+    configure_osmnx(kwargs.get("timeout", DEFAULT_TIMEOUT))
+    return asyncio.run(download_async(attempts, **kwargs))
@@ -0,0 +1,155 @@
+"""Takip rotaları için yol ağı sadeleştirme ve budama adımı.
+
+İki aşamadan oluşur:
+
+1. Yalnızca en büyük güçlü bağlı bileşen tutulur; oradan çıkılamayan ya da
+   oraya ulaşılamayan düğümler hiçbir kamera çifti için rota üretemez.
+2. Derecesi 2 olan ara düğümler (tek yönlü zincirde 1 giriş/1 çıkış, çift
+   yönlü zincirde aynı iki komşu) tek bir kenara katlanır; atlanan düğümler
+   yeni kenarın çizgisine (ara noktalarına) eklenir, uzunluklar toplanır ve
+   hız, zincirin toplam geçiş süresini koruyacak şekilde hesaplanır.
+
+Sonuçta rota düğüm listeleri kısalır, Dijkstra daha az düğüm gezer ve
+haritadaki çizim yine kenar çizgileriyle birebir aynı kalır.
+"""
+from typing import Any, Dict, Tuple
+
+import numpy as np
+from scipy.sparse.csgraph import connected_components
+
+from road_graph import DEFAULT_SPEED_KPH, CompactGraph, take_geometry
+
+# Cache üst verisine yazılır; adım değişirse eski cache'ler reddedilir
+SIMPLIFY_PIPELINE = "lscc+degree2"
+
+
+def subgraph(graph: CompactGraph, nodes: np.ndarray) -> CompactGraph:
+    """Verilen düğüm indeksleri ve aralarındaki kenarlardan oluşan alt graf"""
+    keep = np.zeros(graph.num_nodes, dtype=bool)
+    keep[nodes] = True
+    src = graph.edge_sources()
+    edges = np.flatnonzero(keep[src] & keep[graph.indices])
+    nodes = np.flatnonzero(keep)
+    return CompactGraph.from_edges(
+        graph.node_ids[nodes], graph.lat[nodes], graph.lon[nodes],
+        graph.node_ids[src[edges]], graph.node_ids[graph.indices[edges]], graph.lengths[edges],
+        geometry=take_geometry(graph.geometry, edges), speeds=graph.speeds[edges]
+    )
+
+
+def largest_strong_component(graph: CompactGraph) -> CompactGraph:
+    """Grafın en büyük güçlü bağlı bileşenini döner"""
+    if graph.num_nodes == 0:
+        return graph
+    _, labels = connected_components(graph.to_csr_matrix(), directed=True, connection='strong')
+    largest = np.bincount(labels).argmax()
+    return subgraph(graph, np.flatnonzero(labels == largest))
+
+
+def _interior_nodes(graph: CompactGraph, succ, pred) -> np.ndarray:
+    """Zincir ortasında kalan (katlanabilir) düğümleri işaretler"""
+    interior = np.zeros(graph.num_nodes, dtype=bool)
+    out_degree = np.diff(graph.indptr)
+    in_degree = np.bincount(graph.indices, minlength=graph.num_nodes)
+    candidates = np.flatnonzero(((out_degree == 1) & (in_degree == 1))
+                                | ((out_degree == 2) & (in_degree == 2)))
+    for node in candidates.tolist():
+        s, p = succ[node], pred[node]
+        if node in s:
+            continue
+        if len(s) == 1:
+            interior[node] = s[0] != p[0]
+        else:
+            interior[node] = set(s) == set(p)
+    return interior
+
+
+def contract_degree2(graph: CompactGraph) -> CompactGraph:
+    """Derece-2 zincirlerini ara noktaları korunmuş tek kenarlara katlar"""
+    indptr = graph.indptr.tolist()
+    dst = graph.indices.tolist()
+    lengths = graph.lengths.tolist()
+    times = graph.travel_times().tolist()
+    geom_indptr, geom_lat, geom_lon = graph.geometry
+    succ = [dst[indptr[i]:indptr[i + 1]] for i in range(graph.num_nodes)]
+    pred = [[] for _ in range(graph.num_nodes)]
+    for u, targets in enumerate(succ):
+        for v in targets:
+            pred[v].append(u)
+    interior = _interior_nodes(graph, succ, pred)
+
+    def edge_points(edge):
+        start, end = geom_indptr[edge], geom_indptr[edge + 1]
+        return np.column_stack((geom_lat[start:end], geom_lon[start:end]))
+
+    best: Dict[Tuple[int, int], Tuple[float, list, float]] = {}
+    visited = np.zeros(graph.num_nodes, dtype=bool)
+
+    def emit(u, w, length, points, time):
+        if u != w and ((u, w) not in best or length < best[(u, w)][0]):
+            best[(u, w)] = (length, points, time)
+
+    for u in np.flatnonzero(~interior).tolist():
+        for edge in range(indptr[u], indptr[u + 1]):
+            prev, cur = u, dst[edge]
+            length, points, time = lengths[edge], [edge_points(edge)], times[edge]
+            while interior[cur]:
+                visited[cur] = True
+                points.append(np.array([[graph.lat[cur], graph.lon[cur]]]))
+                start, end = indptr[cur], indptr[cur + 1]
+                # Tek yönlü zincirde tek çıkış var; çift yönlüde geldiğimiz komşuya dönmeyiz
+                nxt = start if end - start == 1 else next(e for e in range(start, end) if dst[e] != prev)
+                length += lengths[nxt]
+                time += times[nxt]
+                points.append(edge_points(nxt))
+                prev, cur = cur, dst[nxt]
+            emit(u, cur, length, points, time)
+
+    # Yalnızca ara düğümlerden oluşan kapalı halkalar (uç düğümü olmayan) olduğu gibi kalır
+    for u in np.flatnonzero(interior & ~visited).tolist():
+        interior[u] = False
+        for edge in range(indptr[u], indptr[u + 1]):
+            emit(u, dst[edge], lengths[edge], [edge_points(edge)], times[edge])
+
+    nodes = np.flatnonzero(~interior)
+    pairs = np.array(list(best.keys()), dtype=np.int64).reshape(-1, 2)
+    middles = [np.concatenate(points) for _, points, _ in best.values()]
+    new_geom_indptr = np.zeros(len(middles) + 1, dtype=np.int64)
+    np.cumsum([len(m) for m in middles], out=new_geom_indptr[1:])
+    flat = np.concatenate(middles) if middles else np.empty((0, 2))
+    new_lengths = np.array([length for length, _, _ in best.values()], dtype=np.float64)
+    new_times = np.array([time for _, _, time in best.values()], dtype=np.float64)
+    # Katlanan kenarın hızı = toplam uzunluk / toplam süre (km/sa)
+    speeds = np.where(new_times > 0, new_lengths / np.maximum(new_times, 1e-9) * 3.6, DEFAULT_SPEED_KPH)
+    return CompactGraph.from_edges(
+        graph.node_ids[nodes], graph.lat[nodes], graph.lon[nodes],
+        graph.node_ids[pairs[:, 0]], graph.node_ids[pairs[:, 1]],
+        new_lengths.astype(np.float32),
+        geometry=(new_geom_indptr, flat[:, 0], flat[:, 1]), speeds=speeds
+    )
+
+
+def simplify_graph(graph: CompactGraph) -> Tuple[CompactGraph, Dict[str, Any]]:
+    """En büyük güçlü bileşeni tutar, derece-2 zincirlerini katlar ve ne kadar sadeleştiğini raporlar"""
+    stats: Dict[str, Any] = {"nodes_before": graph.num_nodes, "edges_before": graph.num_edges}
+
+    pruned = largest_strong_component(graph)
+    stats["pruned_nodes"] = graph.num_nodes - pruned.num_nodes
+    stats["pruned_edges"] = graph.num_edges - pruned.num_edges
+
+    contracted = contract_degree2(pruned)
+    stats["contracted_nodes"] = pruned.num_nodes - contracted.num_nodes
+    stats["contracted_edges"] = pruned.num_edges - contracted.num_edges
+    stats["nodes_after"] = contracted.num_nodes
+    stats["edges_after"] = contracted.num_edges
+
+    contracted.metadata = {**graph.metadata, "simplify": stats}
+    return contracted, stats
+
+
+def describe(stats: Dict[str, Any]) -> str:
+    """Sadeleştirme raporunun tek satırlık özeti"""
+    return (f"{stats['nodes_before']} -> {stats['nodes_after']} düğüm, "
+            f"{stats['edges_before']} -> {stats['edges_after']} kenar "
+            f"(bağlantısız: {stats['pruned_nodes']} düğüm/{stats['pruned_edges']} kenar, "
+            f"katlanan: {stats['contracted_nodes']} düğüm/{stats['contracted_edges']} kenar)")
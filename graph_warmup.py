@@ -0,0 +1,115 @@
+"""Yol ağını arka planda yükleyip ısıtan yardımcı.
+
+Uygulama süreç başına tek bir ``GraphWarmup`` tutar (``st.cache_resource``);
+yükleme bir iş parçacığında sürerken arayüz yalnızca ilerleme durumunu
+gösterir. Sonuç tüm oturumlarca kopyalanmadan paylaşılan tek nesnedir.
+
+``refresh`` yükleyiciyi yeniden çalıştırır; yeni sonuç hazır olana kadar
+eski sonuç hizmet vermeye devam eder, ardından tek bir atama ile yerine
+geçer ve ``version`` bir artar.
+"""
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+# loader(report, cancelled) -> sonuç; report(mesaj, ilerleme=None, level="info"),
+# cancelled: iptal istendiğinde işaretlenen threading.Event
+Loader = Callable[[Callable[..., None], threading.Event], Any]
+
+
+class GraphWarmup:
+    """Yükleyiciyi arka plan iş parçacığında çalıştırır ve ilerlemesini izler"""
+
+    def __init__(self, loader: Loader, name: str = "road-network"):
+        self.loader = loader
+        self.name = name
+        self.stage = "Bekliyor"
+        self.progress = 0.0
+        self.messages: List[Tuple[str, str]] = []
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        # Sonuç her değiştiğinde artar; türetilmiş önbellekler buna göre geçersizlenir
+        self.version = 0
+        self.refreshing = False
+        self.refresh_error: Optional[BaseException] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._done = threading.Event()
+        self.cancelled = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "GraphWarmup":
+        with self._lock:
+            if self._thread is None:
+                self.started_at = time.time()
+                self._thread = threading.Thread(
+                    target=self._run, name=f"warmup-{self.name}", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def report(self, message: str, progress: Optional[float] = None, level: str = "info") -> None:
+        """Yükleyicinin ilerleme bildirimi (iş parçacığı içinden çağrılır)"""
+        self.stage = message
+        if progress is not None:
+            self.progress = min(max(progress, 0.0), 1.0)
+        if level != "info":
+            self.messages.append((level, message))
+
+    def cancel(self) -> None:
+        """Süren yüklemeyi/yenilemeyi iptal ister (yükleyici ``cancelled`` olayını izler)"""
+        self.cancelled.set()
+        self.report("İptal ediliyor...")
+
+    def _run(self) -> None:
+        try:
+            self.result = self.loader(self.report, self.cancelled)
+            self.version += 1
+            self.report("Yol ağı hazır", 1.0)
+        except BaseException as e:
+            self.error = e
+            self.report(f"Yol ağı hazırlanamadı: {e}", level="error")
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
+
+    def refresh(self, loader: Optional[Loader] = None) -> bool:
+        """Yükleyiciyi arka planda yeniden çalıştırır; zaten çalışıyorsa False döner"""
+        with self._lock:
+            if not self.done or self.refreshing:
+                return False
+            self.refreshing = True
+            self.refresh_error = None
+            self.cancelled.clear()
+            threading.Thread(
+                target=self._run_refresh, args=(loader or self.loader,),
+                name=f"refresh-{self.name}", daemon=True
+            ).start()
+        return True
+
+    def _run_refresh(self, loader: Loader) -> None:
+        try:
+            result = loader(self.report, self.cancelled)
+            # Eski sonucu kullanan oturumlar kendi çalıştırmalarını onunla bitirir,
+            # sonraki çalıştırmalar yeni sonucu görür
+            with self._lock:
+                self.result = result
+                self.error = None
+                self.version += 1
+            self.report("Yol ağı yenilendi", 1.0)
+        except BaseException as e:
+            self.refresh_error = e
+            self.report(f"Yol ağı yenilenemedi, önceki ağ kullanılmaya devam ediyor: {e}", level="error")
+        finally:
+            self.refreshing = False
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
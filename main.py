@@ -1,17 +1,46 @@
 import streamlit as st
 import json
 import os
-import pickle
-from typing import List, Dict, Any
-import math
+import time
+from itertools import islice
+from typing import List, Dict, Any, Optional
 
 import folium
 from streamlit_folium import st_folium
-import osmnx as ox
-import networkx as nx
+
+from road_graph import CompactGraph, GraphCacheError
+from routing import DEFAULT_ROUTE_METHOD, LENGTH_PROFILE, ROUTE_METHODS, route_length, shortest_path
+from route_cache import RouteCache
+from road_tiles import TileLimitError, TileStore, tile_key
+from graph_warmup import GraphWarmup
+from graph_simplify import describe as describe_simplify
+from graph_download import download
+from spatial_index import node_index
+from camera_index import CameraIndex, cameras_digest
+from camera_matrix import MatrixJob
+from camera_snap import camera_groups, graph_signature, needs_resnap, resnap_cameras, snap_points
+from route_matching import find_cameras_on_route
+from graph_builder import (
+    GRAPH_CACHE_FILE, MAX_RESIDENT_TILES, TILE_DIR,
+    download_graph, download_graph_by_place, graph_cache_metadata
+)
 
 DATA_FILE = "kamera_data.json"
-GRAPH_CACHE_FILE = "bolu_graph_cache.pkl"
+# Düğüm/kenar -> kamera ters indeksi, kamera dosyasıyla birlikte kaydedilir
+CAMERA_INDEX_FILE = "kamera_index.json"
+# Kameralar arası en kısa yol uzunlukları (float32 .npy, mmap ile açılır) ve yanında kamera sırası (.json)
+CAMERA_MATRIX_FILE = "kamera_mesafe.npy"
+
+# Yol ağı arka planda hazırlanırken arayüzün ilerlemeyi yenileme aralığı
+WARMUP_POLL_SECONDS = 0.5
+
+# HTS_OFFLINE=1 ise yol ağı asla indirilmez, cache build_graph.py ile hazırlanmalıdır
+OFFLINE_MODE = os.environ.get("HTS_OFFLINE", "") not in ("", "0")
+
+# Kamera eşleme modları: kenar modunda kamera sokak üzerindeki konumuyla, düğüm
+# modunda en yakın kavşakla kaydedilir
+SNAP_MODES = {"edge": "Kenar (sokak üzerindeki konum)", "node": "Düğüm (en yakın kavşak)"}
+DEFAULT_SNAP_MODE = "edge"
 
 # Streamlit sayfa ayarlarını optimize et
 st.set_page_config(
@@ -20,57 +49,121 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-@st.cache_data(show_spinner=False)
-def load_road_network():
-    """Bolu merkez için yol ağını yükler - önce cache'den kontrol eder"""
+def build_road_network(report, cancelled):
+    """Bolu merkez için yol ağını hazırlar - önce cache'den kontrol eder (arka planda çalışır)"""
+    
+    # Karo dizini varsa tek bir graf yerine karolu ağı aç; kayıtlı kameraların karo gruplarına
+    # hizmet verecek çalışma graflarını (kenar paylı birleşik graflar) ilk istekten önce ısıt
+    if TileStore.exists(TILE_DIR):
+        try:
+            report("Karolu yol ağı açılıyor...", 0.1)
+            tile_store = TileStore(TILE_DIR, max_tiles=MAX_RESIDENT_TILES, expected=graph_cache_metadata())
+            cameras = _read_camera_file()
+            # Birleşik graf önbelleği ``max_merged`` graf tutar, fazlası ısıtılsa da düşerdi
+            total = min(len({tile_key(cam['y'], cam['x'], tile_store.tile_size) for cam in cameras}),
+                        tile_store.max_merged)
+            for i, (graph, _) in enumerate(islice(camera_groups(tile_store, cameras), total), 1):
+                if graph is not None:
+                    graph.warm()
+                report(f"Kamera bölgeleri hazırlanıyor ({i}/{total})", 0.1 + 0.9 * i / total)
+            return tile_store
+        except Exception as e:
+            report(f"Karo dizini açılamadı, tek bölgeli yol ağı kullanılacak ({e})", level="warning")
     
     # Önce cache dosyasını kontrol et
     if os.path.exists(GRAPH_CACHE_FILE):
         try:
-            with open(GRAPH_CACHE_FILE, 'rb') as f:
-                graph = pickle.load(f)
-            st.success("Yol ağı cache'den yüklendi")
-            return graph
+            report("Yol ağı cache'den yükleniyor...", 0.1)
+            graph = CompactGraph.load(GRAPH_CACHE_FILE, expected=graph_cache_metadata())
+            report("Yol ağı cache'den yüklendi, indeksler hazırlanıyor...", 0.6)
+            return graph.warm()
+        except GraphCacheError as e:
+            report(f"Cache geçersiz, yeniden oluşturuluyor... ({e})", level="warning")
         except Exception as e:
-            st.warning(f"Cache dosyası okunamadı, yeniden indiriliyor... ({e})")
+            report(f"Cache dosyası okunamadı, yeniden indiriliyor... ({e})", level="warning")
+    
+    if OFFLINE_MODE:
+        raise RuntimeError("Çevrimdışı modda geçerli bir yol ağı cache'i yok. "
+                           "Cache'i `python build_graph.py --input <dosya.osm>` ile oluşturun.")
     
     # Cache yoksa veya bozuksa internetten çek
-    st.info("Yol ağı verileri internetten indiriliyor... (İlk seferlik)")
+    report("Yol ağı verileri internetten indiriliyor... (İlk seferlik)", 0.2)
+    return _download_and_cache(report, cancelled)
+
+def _download_and_cache(report, cancelled):
+    """Yol ağını indirir, cache'e yazar ve diğer süreçlerle paylaşılacak şekilde mmap ile açar"""
+    def on_event(kind, message, progress):
+        # İndirme ilerlemenin %20-%80 aralığını kaplar
+        level = "warning" if kind in ("retry", "failed") else "info"
+        report(message, None if progress is None else 0.2 + 0.6 * progress, level=level)
+    
+    # Önce bbox, olmazsa şehir ismi ile dene; her yöntem zaman aşımı ve tekrarlarla sınırlı
+    graph = download(
+        [("Bbox sorgusu", download_graph), ("Şehir ismiyle sorgu", download_graph_by_place)],
+        on_event=on_event, cancel_event=cancelled
+    )
     
-    # Düzeltilmiş koordinatlar - Bolu merkez
-    north, south, east, west = 40.7450, 40.7350, 31.6100, 31.5950
+    # Cache'e kaydet (yeni dosya geçici addan tek adımda yerine taşınır)
     try:
-        # OSMnx'nin yeni API'sine uygun kullanım
-        graph = ox.graph_from_bbox(north=north, south=south, east=east, west=west, network_type='drive')
-        
-        # Cache'e kaydet
-        try:
-            with open(GRAPH_CACHE_FILE, 'wb') as f:
-                pickle.dump(graph, f)
-            st.success("Yol ağı cache'e kaydedildi")
-        except Exception as e:
-            st.warning(f"Cache kaydedilemedi: {e}")
-        
-        return graph
+        graph.save(GRAPH_CACHE_FILE)
+        graph = CompactGraph.load(GRAPH_CACHE_FILE, verify=False)
+        report("Yol ağı cache'e kaydedildi, indeksler hazırlanıyor...", 0.8)
     except Exception as e:
-        st.error(f"Yol ağı yüklenirken hata: {e}")
-        # Alternatif olarak şehir ismi ile dene
+        report(f"Cache kaydedilemedi: {e}", level="warning")
+    
+    return graph.warm()
+
+def rebuild_road_network(report, cancelled):
+    """Yol ağını yeniden üretir; bu sırada eski ağ hizmet vermeye devam eder"""
+    if TileStore.exists(TILE_DIR) or OFFLINE_MODE:
+        # Karolar ve çevrimdışı cache build_graph.py ile üretilir, burada diskten yeniden açılır
+        return build_road_network(report, cancelled)
+    report("Yol ağı arka planda yeniden indiriliyor...", 0.2)
+    return _download_and_cache(report, cancelled)
+
+@st.cache_resource(show_spinner=False)
+def get_graph_warmup():
+    """Süreç başına tek yol ağı ısıtmasını döner (ilk çağrıda arka planda başlatılır)
+
+    ``st.cache_resource`` sonucu kopyalamadan paylaşır: tüm oturumlar ve yeniden
+    çalıştırmalar aynı graf nesnesini ve ona bağlı türetilmiş yapıları görür.
+    """
+    return GraphWarmup(build_road_network, "road_network").start()
+
+@st.cache_resource(show_spinner=False)
+def get_matrix_job():
+    """Süreç başına tek mesafe matrisi işini döner (tüm oturumlar aynı matrisi görür)"""
+    return MatrixJob(CAMERA_MATRIX_FILE)
+
+@st.cache_resource(show_spinner=False)
+def get_route_cache():
+    """Süreç başına tek rota önbelleğini döner (tüm oturumlar paylaşır)"""
+    return RouteCache()
+
+def load_road_network():
+    """Hazır yol ağını döner (tek graf veya karo deposu); ısıtma bitmediyse None"""
+    warmup = get_graph_warmup()
+    return warmup.result if warmup.done else None
+
+def get_working_graph(points):
+    """Verilen (enlem, boylam) noktalarını kapsayan yol ağını döner"""
+    network = load_road_network()
+    if isinstance(network, TileStore):
         try:
-            st.info("Alternatif yöntemle deneniyor...")
-            graph = ox.graph_from_place("Bolu, Turkey", network_type='drive')
-            
-            # Cache'e kaydet
-            try:
-                with open(GRAPH_CACHE_FILE, 'wb') as f:
-                    pickle.dump(graph, f)
-                st.success("Yol ağı alternatif yöntemle yüklendi ve cache'lendi")
-            except Exception as e:
-                st.warning(f"Cache kaydedilemedi: {e}")
-            
-            return graph
-        except Exception as e2:
-            st.error(f"Alternatif yöntem de başarısız: {e2}")
+            return network.graph_for_points(points)
+        except TileLimitError as e:
+            st.error(f"Seçilen konumlar için yol ağı yüklenemedi: {e}")
             return None
+    return network
+
+def _read_camera_file() -> List[Dict[str, Any]]:
+    """Kamera dosyasını arayüze mesaj basmadan okur (arka plan iş parçacıkları için)"""
+    try:
+        with open(DATA_FILE, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        return data if isinstance(data, list) else []
+    except Exception:
+        return []
 
 def load_camera_data() -> List[Dict[str, Any]]:
     try:
@@ -84,108 +177,163 @@ def load_camera_data() -> List[Dict[str, Any]]:
         st.error(f"Veri dosyası okunurken hata oluştu: {e}")
         return []
 
-def save_camera_data(cameras: List[Dict[str, Any]]) -> bool:
+def load_camera_index(cameras: List[Dict[str, Any]]) -> CameraIndex:
+    """Kayıtlı kamera indeksini açar; kameralarla tutmuyorsa yeniden kurar"""
+    return CameraIndex.load(CAMERA_INDEX_FILE, cameras)
+
+def save_camera_data(cameras: List[Dict[str, Any]], index: Optional[CameraIndex] = None) -> bool:
     try:
         with open(DATA_FILE, 'w', encoding='utf-8') as file:
             json.dump(cameras, file, ensure_ascii=False, indent=2)
+        if index is None:
+            index = CameraIndex.from_cameras(cameras)
+        index.save(CAMERA_INDEX_FILE, cameras)
         return True
     except Exception as e:
         st.error(f"Veri kaydedilirken hata oluştu: {e}")
         return False
 
-def add_new_camera(name: str, x: float, y: float, node_id, cameras: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def add_new_camera(name: str, x: float, y: float, node_id, cameras: List[Dict[str, Any]],
+                   snap: Optional[Dict[str, Any]] = None,
+                   index: Optional[CameraIndex] = None) -> List[Dict[str, Any]]:
     new_camera = {
         "name": name,
         "x": x,
         "y": y,
         "node_id": node_id
     }
+    if snap:
+        new_camera.update({k: v for k, v in snap.items() if k != "node_id"})
     cameras.append(new_camera)
+    if index is not None:
+        index.add(new_camera)
     return cameras
 
+def delete_camera(name: str, cameras: List[Dict[str, Any]],
+                  index: Optional[CameraIndex] = None) -> List[Dict[str, Any]]:
+    """Kamerayı listeden ve indeksten çıkarır"""
+    for camera in cameras:
+        if camera['name'] == name and index is not None:
+            index.remove(camera)
+    return [camera for camera in cameras if camera['name'] != name]
+
 def find_nearest_node(graph, lat, lon):
     """Verilen koordinatlara en yakın yol düğümünü bulur"""
     if graph is None:
         return None
     try:
-        return ox.distance.nearest_nodes(graph, lon, lat)
+        return node_index(graph).nearest(lat, lon)
     except Exception as e:
         st.error(f"En yakın düğüm bulunamadı: {e}")
         return None
 
-def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """İki nokta arasındaki mesafeyi hesaplar (kilometre)"""
-    R = 6371  # Dünya yarıçapı km
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    return R * c
-
-def calculate_route(graph, start_node, end_node):
-    """İki düğüm arasında en kısa yolu hesaplar"""
-    if graph is None or start_node is None or end_node is None:
+def snap_camera(graph, lat, lon, mode=DEFAULT_SNAP_MODE) -> Optional[Dict[str, Any]]:
+    """Konumu yol ağına eşler; kenar modunda kenar, kenar üzerindeki konum ve dik uzaklığı da döner"""
+    if graph is None:
         return None
     try:
-        route = nx.shortest_path(graph, start_node, end_node, weight='length')
-        return route
+        snap = snap_points(graph, [lat], [lon], [mode])[0]
     except Exception as e:
-        st.error(f"Rota hesaplanamadı: {e}")
+        st.error(f"En yakın yol bulunamadı: {e}")
         return None
+    if snap is not None:
+        snap["graph_version"] = graph_signature(load_road_network())
+    return snap
 
-def find_cameras_on_route(graph, route_nodes, cameras, buffer_distance=0.1):
-    """Rota üzerindeki veya yakınındaki kameraları bulur"""
-    if not route_nodes or not cameras:
-        return []
-    
-    route_cameras = []
+def resolve_camera_node(graph, camera):
+    """Kameranın düğümünü döner; düğüm bu ağda yoksa kamera konumuna en yakın düğümü kullanır"""
+    node_id = camera.get('node_id')
+    if graph is None or graph.has_node(node_id):
+        return node_id
+    return find_nearest_node(graph, camera['y'], camera['x'])
+
+def calculate_route(graph, start_node, end_node, method=DEFAULT_ROUTE_METHOD):
+    """İki düğüm arasında en kısa yolu ve uzunluğunu (metre) hesaplar (aynı çift için önbellekten döner)"""
+    if graph is None or start_node is None or end_node is None:
+        return None, float("inf")
+    try:
+        # Yöntemler aynı en kısa yolu bulduğundan anahtarda yöntem değil ağırlık profili yer alır
+        def compute():
+            route_nodes = shortest_path(graph, start_node, end_node, method)
+            return route_nodes, route_length(graph, route_nodes)
+        return get_route_cache().get_or_compute(
+            graph_signature(load_road_network()), (start_node, end_node, LENGTH_PROFILE), compute
+        )
+    except Exception as e:
+        st.error(f"Rota hesaplanamadı: {e}")
+        return None, float("inf")
+
+def route_analysis_key(start_camera, end_camera):
+    """Güzergah analizinin geçerli olduğu durum: kamera çifti, kamera eşlemeleri ve yol ağı sürümü"""
+    return (start_camera['name'], end_camera['name'],
+            cameras_digest(st.session_state.cameras), graph_signature(load_road_network()))
+
+def analyze_route(start_camera, end_camera) -> Dict[str, Any]:
+    """Rotayı, haritasını ve rota üzerindeki kameraları bir kez hesaplar"""
+    if not (start_camera.get('node_id') and end_camera.get('node_id')):
+        return {"error": "Seçilen kameraların yol ağı bilgileri eksik!"}
+    graph = get_working_graph([
+        (start_camera['y'], start_camera['x']),
+        (end_camera['y'], end_camera['x'])
+    ])
+    if graph is None:
+        return {"error": "Seçilen kameralar için yol ağı açılamadı!"}
+    # Sadeleştirilmiş ağda artık bulunmayan düğümler kamera konumundan yeniden eşlenir
+    start_node = resolve_camera_node(graph, start_camera)
+    end_node = resolve_camera_node(graph, end_camera)
+    route_nodes, route_meters = calculate_route(
+        graph, start_node, end_node, st.session_state.get("route_method", DEFAULT_ROUTE_METHOD)
+    )
+    if not route_nodes:
+        return {"error": "Bu iki kamera arasında güzergah bulunamadı!"}
+    return {
+        "route_nodes": route_nodes,
+        "route_meters": route_meters,
+        "route_map": create_route_map(graph, route_nodes, st.session_state.cameras, start_camera, end_camera),
+        "route_cameras": find_cameras_on_route(
+            graph, route_nodes, st.session_state.cameras, index=st.session_state.camera_index
+        ),
+    }
+
+def render_route_analysis(analysis: Dict[str, Any]) -> None:
+    """Saklanmış güzergah analizini çizer (hesap yapmaz)"""
+    st.success(f"Güzergah bulundu! {len(analysis['route_nodes'])} düğümden oluşuyor, "
+               f"uzunluk {analysis['route_meters'] / 1000:.2f} km.")
     
-    for camera in cameras:
-        camera_node = camera.get('node_id')
-        if camera_node in route_nodes:
-            # Kamera doğrudan rota üzerinde
-            route_cameras.append({
-                **camera,
-                "on_route": True,
-                "distance_to_route": 0
-            })
-        else:
-            # Kameranın rotaya yakınlığını kontrol et
-            min_distance = float('inf')
-            for route_node in route_nodes:
-                if graph.has_node(route_node) and graph.has_node(camera_node):
-                    try:
-                        # İki düğüm arasındaki koordinat farkını hesapla
-                        route_coord = (graph.nodes[route_node]['y'], graph.nodes[route_node]['x'])
-                        camera_coord = (graph.nodes[camera_node]['y'], graph.nodes[camera_node]['x'])
-                        distance = calculate_distance(route_coord[0], route_coord[1], 
-                                                    camera_coord[0], camera_coord[1])
-                        min_distance = min(min_distance, distance)
-                    except:
-                        continue
-            
-            if min_distance <= buffer_distance:
-                route_cameras.append({
-                    **camera,
-                    "on_route": False,
-                    "distance_to_route": min_distance
-                })
+    if analysis["route_map"]:
+        st.subheader("Güzergah Haritası")
+        st_folium(
+            analysis["route_map"], 
+            width=700, 
+            height=500, 
+            key="route_map",
+            returned_objects=["last_clicked"]
+        )
     
-    # Rota üzerindeki kameraları önce, sonra yakın olanları mesafeye göre sırala
-    route_cameras.sort(key=lambda x: (not x['on_route'], x['distance_to_route']))
-    return route_cameras
+    if analysis["route_cameras"]:
+        st.subheader("Güzergah Üzerindeki Kameralar")
+        st.caption("Kameralar hırsızın karşılaşacağı sırayla; süreler yol hızlarına göre "
+                   "başlangıç kamerasından itibaren beklenen varış zamanıdır.")
+        for i, cam in enumerate(analysis["route_cameras"], 1):
+            status = "Rota üzerinde" if cam['on_route'] else f"{cam['distance_to_route']:.2f} km yakınında"
+            st.write(f"**{i}.** {cam['name']} - *{status}* - "
+                     f"{cam['distance_along_route']:.2f} km, "
+                     f"+{format_offset(cam['arrival_offset'])}")
+    else:
+        st.info("Bu güzergah üzerinde başka kamera bulunamadı.")
+
+def format_offset(seconds: float) -> str:
+    """Varış süresini dakika/saniye olarak biçimlendirir"""
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes} dk {seconds:02d} sn" if minutes else f"{seconds} sn"
 
 def create_route_map(graph, route_nodes, cameras, start_camera, end_camera):
     """Rota ve kameraları gösteren harita oluşturur"""
     if not route_nodes or graph is None:
         return None
     
-    # Harita merkezi hesapla
-    route_coords = []
-    for node in route_nodes:
-        if graph.has_node(node):
-            route_coords.append([graph.nodes[node]['y'], graph.nodes[node]['x']])
+    # Harita merkezi hesapla (kenar çizgileri açılmış rota)
+    route_coords = graph.route_coords(route_nodes)
     
     if not route_coords:
         return None
@@ -283,16 +431,54 @@ def create_camera_map(cameras):
     folium.LatLngPopup().add_to(harita)
     return harita
 
-def clear_cache():
-    """Cache dosyalarını temizler"""
+def resnap_if_graph_changed(network):
+    """Kameralar başka bir yol ağına göre eşlenmişse hepsini tek geçişte yeniden eşler ve kaydeder"""
+    signature = graph_signature(network)
+    if signature is None or st.session_state.get('resnap_signature') == signature:
+        return
+    st.session_state.resnap_signature = signature
+    cameras = st.session_state.cameras
+    if not needs_resnap(cameras, signature):
+        return
     try:
-        if os.path.exists(GRAPH_CACHE_FILE):
-            os.remove(GRAPH_CACHE_FILE)
-        st.cache_data.clear()
-        return True
+        cameras, report = resnap_cameras(cameras, camera_groups(network, cameras), signature)
     except Exception as e:
-        st.error(f"Cache temizlenirken hata: {e}")
-        return False
+        st.error(f"Kameralar yeni yol ağına eşlenemedi: {e}")
+        return
+    st.session_state.cameras = cameras
+    # Düğüm/kenar eşlemeleri topluca değiştiği için indeks baştan kurulur
+    st.session_state.camera_index = CameraIndex.from_cameras(cameras)
+    save_camera_data(cameras, st.session_state.camera_index)
+    
+    st.info(f"Yol ağı değişti, {report['total']} kamera yeniden eşlendi "
+            f"({len(report['moved'])} taşındı, {len(report['failed'])} başarısız, {report['seconds']:.2f} sn)")
+    if report['moved'] or report['failed']:
+        with st.expander("Yeniden Eşleme Ayrıntıları"):
+            for item in report['moved']:
+                st.write(f"**{item['name']}**: {item['old_node']} → {item['new_node']}")
+            for name in report['failed']:
+                st.warning(f"{name}: yol ağında karşılığı bulunamadı")
+
+def update_camera_matrix(network):
+    """Kamera listesi ya da yol ağı değiştiyse mesafe matrisini arka planda günceller (yalnızca yeni kameralar hesaplanır)
+
+    Karolu ağda hesaplanmaz: tüm kameraları kapsayan tek graf bütün ili belleğe alırdı.
+    """
+    cameras = st.session_state.cameras
+    if not cameras or not isinstance(network, CompactGraph):
+        return
+    key = (cameras_digest(cameras), graph_signature(network))
+    if st.session_state.get('matrix_key') == key:
+        return
+    st.session_state.matrix_key = key
+    nodes = [resolve_camera_node(network, cam) for cam in cameras]
+    get_matrix_job().submit(network, [cam['name'] for cam in cameras], nodes, key[1])
+
+def refresh_road_network():
+    """Yol ağını arka planda yeniler; yeni ağ hazır olunca eskisinin yerine geçer"""
+    # Eski ağ için süren mesafe matrisi hesabı boşa gider; yeni ağ gelince baştan kurulur
+    get_matrix_job().cancel()
+    return get_graph_warmup().refresh(rebuild_road_network)
 
 def main():
     # Ana başlık
@@ -313,29 +499,75 @@ def main():
         st.header("Sistem Ayarları")
         
         # Cache durumunu göster
-        if os.path.exists(GRAPH_CACHE_FILE):
+        network = load_road_network()
+        if isinstance(network, TileStore):
+            st.success(f"Karolu yol ağı: {len(network.available)} karo "
+                       f"({network.resident_tiles}/{network.max_tiles} bellekte)")
+        elif os.path.exists(GRAPH_CACHE_FILE):
             file_size = os.path.getsize(GRAPH_CACHE_FILE) / 1024  # KB
             st.success(f"Yol ağı cache'i mevcut ({file_size:.1f} KB)")
         else:
             st.info("Cache henüz oluşturulmamış")
         
-        if st.button("Cache'i Yenile"):
-            if clear_cache():
-                st.success("Cache temizlendi, sayfa yeniden yüklenecek...")
-                st.rerun()
+        warmup = get_graph_warmup()
+        if isinstance(network, CompactGraph) and network.metadata.get("built_at"):
+            st.caption(f"Yol ağı üretim zamanı: {network.metadata['built_at']} (sürüm {warmup.version})")
+        if isinstance(network, CompactGraph) and network.metadata.get("simplify"):
+            st.caption(f"Sadeleştirme: {describe_simplify(network.metadata['simplify'])}")
+        
+        if warmup.refreshing:
+            st.info(warmup.stage)
+            st.progress(warmup.progress)
+            if st.button("Yenilemeyi İptal Et"):
+                warmup.cancel()
+        elif st.button("Cache'i Yenile"):
+            if refresh_road_network():
+                st.success("Yol ağı arka planda yenileniyor, bu sırada mevcut ağ kullanılmaya devam eder.")
+        if warmup.refresh_error is not None and not warmup.refreshing:
+            st.warning(f"Son yenileme başarısız oldu: {warmup.refresh_error}")
+        
+        st.radio(
+            "Kamera Eşleme", list(SNAP_MODES), format_func=SNAP_MODES.get, key="snap_mode",
+            help="Kenar modunda kamera, yol üzerindeki tam konumu ile kaydedilir; "
+                 "düğüm modunda en yakın kavşağa bağlanır."
+        )
+        st.radio(
+            "Rota Algoritması", list(ROUTE_METHODS), format_func=ROUTE_METHODS.get, key="route_method",
+            help="İki yöntem de aynı en kısa yolu bulur. Dijkstra SciPy ile derlenmiş koddadır; A* "
+                 "daha az düğüm gezer ama Python ile çalışır, hangisinin hızlı olduğu ağa göre değişir."
+        )
         
         st.markdown("---")
-        st.caption("İlk açılışta yol ağı indirilir ve cache'lenir. Sonraki açılışlar çok daha hızlı olur.")
+        st.caption("İlk açılışta yol ağı indirilir ve cache'lenir. Sonraki açılışlar çok daha hızlı olur. "
+                   "Yenileme sırasında eski ağ hizmet vermeye devam eder.")
         
         # İstatistikler
         if 'cameras' in st.session_state:
             st.markdown("### İstatistikler")
             st.metric("Toplam Kamera", len(st.session_state.cameras))
+            route_stats = get_route_cache().stats()
+            st.caption(f"Rota önbelleği: {route_stats['routes']}/{route_stats['max_routes']} rota, "
+                       f"{route_stats['hits']} isabet / {route_stats['misses']} ıska "
+                       f"(%{route_stats['hit_rate'] * 100:.0f})")
 
-    # Yol ağını yükle
-    graph = load_road_network()
+    # Yol ağı arka planda hazırlanıyorsa yalnızca ilerlemeyi göster ve kısa aralıklarla yenile
+    if not warmup.done or (warmup.result is None and warmup.refreshing):
+        st.progress(warmup.progress, text=f"{warmup.stage} ({warmup.elapsed:.0f} sn)")
+        for _, message in warmup.messages:
+            st.warning(message)
+        if st.button("İndirmeyi İptal Et"):
+            warmup.cancel()
+        time.sleep(WARMUP_POLL_SECONDS)
+        st.rerun()
     
+    # Karolu modda karolar kamera/rota noktalarına göre sonradan yüklenir
+    graph = warmup.result
     if graph is None:
+        for level, message in warmup.messages:
+            if level == "error":
+                st.error(message)
+            else:
+                st.warning(message)
         st.error("Yol ağı yüklenemedi. Lütfen daha sonra tekrar deneyin.")
         return
 
@@ -344,6 +576,12 @@ def main():
         st.session_state.cameras = load_camera_data()
         if st.session_state.cameras:
             st.success(f"{len(st.session_state.cameras)} adet kayıtlı kamera yüklendi.")
+    if 'camera_index' not in st.session_state:
+        st.session_state.camera_index = load_camera_index(st.session_state.cameras)
+    
+    # Yol ağı yeniden üretildiyse kayıtlı düğüm/kenar eşlemeleri eskimiş olabilir
+    resnap_if_graph_changed(graph)
+    update_camera_matrix(graph)
 
     # Ana içerik alanı
     tab1, tab2, tab3 = st.tabs(["Kamera Ekle", "Güzergah Analizi", "Kamera Listesi"])
@@ -390,13 +628,15 @@ def main():
                         if camera_name.strip() in existing_names:
                             st.error("Bu isimde bir kamera zaten kayıtlı!")
                         else:
-                            # En yakın yol düğümünü bul
-                            node_id = find_nearest_node(graph, y, x)
-                            if node_id is not None:
+                            # Seçilen moda göre en yakın yola veya yol düğümüne oturt
+                            graph = get_working_graph([(y, x)])
+                            snap = snap_camera(graph, y, x, st.session_state.get("snap_mode", DEFAULT_SNAP_MODE))
+                            if snap is not None:
                                 st.session_state.cameras = add_new_camera(
-                                    camera_name.strip(), x, y, node_id, st.session_state.cameras
+                                    camera_name.strip(), x, y, snap["node_id"], st.session_state.cameras, snap,
+                                    index=st.session_state.camera_index
                                 )
-                                if save_camera_data(st.session_state.cameras):
+                                if save_camera_data(st.session_state.cameras, st.session_state.camera_index):
                                     st.success(f"'{camera_name}' başarıyla kaydedildi!")
                                     st.rerun()
                                 else:
@@ -426,53 +666,57 @@ def main():
                     help="Hırsızın son görüldüğü kamera"
                 )
             
+            matrix_job = get_matrix_job()
+            # Başka bir yol ağıyla hesaplanmış matris gösterilmez
+            matrix = matrix_job.matrix if matrix_job.matrix.signature == graph_signature(graph) else None
             if start_camera_name != end_camera_name:
+                network_distance = matrix.distance(start_camera_name, end_camera_name) if matrix is not None else None
+                if network_distance is not None:
+                    st.caption("Yol ağı mesafesi (tablodan): " + (
+                        f"{network_distance / 1000:.2f} km" if network_distance != float("inf") else "yol yok"
+                    ))
                 start_camera = next((cam for cam in st.session_state.cameras if cam['name'] == start_camera_name), None)
                 end_camera = next((cam for cam in st.session_state.cameras if cam['name'] == end_camera_name), None)
                 
-                if st.button("Güzergahı Hesapla", type="primary"):
-                    if start_camera and end_camera:
-                        start_node = start_camera.get('node_id')
-                        end_node = end_camera.get('node_id')
-                        
-                        if start_node and end_node:
+                if start_camera and end_camera:
+                    # Sonuç kamera çiftine göre oturumda saklanır; haritayla etkileşim gibi yeniden
+                    # çalıştırmalarda yeniden hesaplanmadan aynen çizilir
+                    analysis_key = route_analysis_key(start_camera, end_camera)
+                    if st.button("Güzergahı Hesapla", type="primary"):
+                        analysis = st.session_state.get('route_analysis')
+                        if analysis is None or analysis['key'] != analysis_key:
                             with st.spinner("Güzergah hesaplanıyor..."):
-                                route_nodes = calculate_route(graph, start_node, end_node)
-                                
-                            if route_nodes:
-                                st.success(f"Güzergah bulundu! {len(route_nodes)} düğümden oluşuyor.")
-                                
-                                # Rota haritasını oluştur ve göster
-                                route_map = create_route_map(
-                                    graph, route_nodes, st.session_state.cameras, 
-                                    start_camera, end_camera
-                                )
-                                if route_map:
-                                    st.subheader("Güzergah Haritası")
-                                    st_folium(
-                                        route_map, 
-                                        width=700, 
-                                        height=500, 
-                                        key="route_map",
-                                        returned_objects=["last_clicked"]
-                                    )
-                                
-                                # Rota üzerindeki kameraları bul
-                                route_cameras = find_cameras_on_route(graph, route_nodes, st.session_state.cameras)
-                                
-                                if route_cameras:
-                                    st.subheader("Güzergah Üzerindeki Kameralar")
-                                    for i, cam in enumerate(route_cameras, 1):
-                                        status = "Rota üzerinde" if cam['on_route'] else f"{cam['distance_to_route']:.2f} km yakınında"
-                                        st.write(f"**{i}.** {cam['name']} - *{status}*")
-                                else:
-                                    st.info("Bu güzergah üzerinde başka kamera bulunamadı.")
+                                result = analyze_route(start_camera, end_camera)
+                            # Hatalar saklanmaz: düğmeye yeniden basınca tekrar denenir
+                            if result.get("error"):
+                                st.session_state.pop('route_analysis', None)
+                                st.error(result["error"])
                             else:
-                                st.error("Bu iki kamera arasında güzergah bulunamadı!")
-                        else:
-                            st.error("Seçilen kameraların yol ağı bilgileri eksik!")
+                                st.session_state.route_analysis = {"key": analysis_key, **result}
+                    analysis = st.session_state.get('route_analysis')
+                    if analysis is not None and analysis['key'] == analysis_key:
+                        render_route_analysis(analysis)
             else:
                 st.warning("Başlangıç ve bitiş kameraları farklı olmalı!")
+            
+            with st.expander("Kameralar Arası Mesafe Tablosu (km)"):
+                if isinstance(graph, TileStore):
+                    st.info("Karolu yol ağında mesafe tablosu hesaplanmaz; güzergahlar kamera çifti için hesaplanır.")
+                if matrix_job.running:
+                    st.progress(matrix_job.progress, text="Mesafe tablosu arka planda güncelleniyor...")
+                if matrix_job.error is not None:
+                    st.warning(f"Mesafe tablosu güncellenemedi: {matrix_job.error}")
+                    if st.button("Tekrar Dene", key="matrix_retry"):
+                        matrix_job.retry()
+                        st.session_state.pop('matrix_key', None)
+                        st.rerun()
+                if matrix is not None and matrix.names:
+                    st.dataframe(matrix.table(), hide_index=True, use_container_width=True)
+                    if matrix_job.last_seconds is not None:
+                        st.caption(f"Son güncelleme {matrix_job.last_seconds:.2f} sn sürdü; "
+                                   "yeni kameralar için yalnızca kendi satır/sütunları hesaplanır.")
+                elif not matrix_job.running and not isinstance(graph, TileStore):
+                    st.info("Mesafe tablosu yol ağı hazır olduğunda hesaplanır.")
         else:
             st.info("Güzergah analizi için en az 2 kamera gerekli.")
 
@@ -485,7 +729,7 @@ def main():
             # Tablo formatında göster
             for i, camera in enumerate(st.session_state.cameras, 1):
                 with st.container():
-                    col1, col2, col3, col4, col5 = st.columns([1, 3, 2, 2, 2])
+                    col1, col2, col3, col4, col5, col6 = st.columns([1, 3, 2, 2, 2, 1])
                     with col1:
                         st.write(f"**{i}**")
                     with col2:
@@ -496,6 +740,13 @@ def main():
                         st.write(f"{camera['y']:.5f}")
                     with col5:
                         st.write(f"{camera.get('node_id', 'N/A')}")
+                    with col6:
+                        if st.button("Sil", key=f"delete_{camera['name']}"):
+                            st.session_state.cameras = delete_camera(
+                                camera['name'], st.session_state.cameras, st.session_state.camera_index
+                            )
+                            if save_camera_data(st.session_state.cameras, st.session_state.camera_index):
+                                st.rerun()
                     st.divider()
 
             with st.expander("JSON Formatında Görüntüle"):
@@ -524,7 +775,8 @@ def main():
                     with col_a:
                         if st.button("Onayla", type="primary"):
                             st.session_state.cameras = []
-                            if save_camera_data([]):
+                            st.session_state.camera_index = CameraIndex()
+                            if save_camera_data([], st.session_state.camera_index):
                                 st.success("Tüm veriler silindi!")
                                 st.session_state.confirm_delete = False
                                 st.rerun()
@@ -546,14 +798,23 @@ def main():
         st.markdown("""
         **Veri Depolama:**
         - Kamera verileri: `kamera_data.json`
-        - Yol ağı cache: `bolu_graph_cache.pkl`
+        - Kamera indeksi: `kamera_index.json` (düğüm/kenar → kamera, ekleme ve silmede güncellenir)
+        - Mesafe tablosu: `kamera_mesafe.npy` (kameralar arası yol mesafeleri, float32, mmap; yeni kamerada artımlı güncellenir)
+        - Yol ağı cache: `bolu_graph_cache.bin` (mmap ile paylaşılan CSR dizileri)
+        - Çevrimdışı cache üretimi: `python build_graph.py --input bolu.osm` (`HTS_OFFLINE=1` ile indirme kapatılır)
+        - İndirme: deneme başına zaman aşımı, üstel bekleme ile tekrar ve iptal; Overpass adresi `HTS_OVERPASS_URL` ile değiştirilebilir
         
         **Kullanılan Teknolojiler:**
         - OSMnx: OpenStreetMap yol ağı verileri
-        - NetworkX: Graf algoritmaları ve en kısa yol hesaplaması
+        - NumPy / SciPy: Sıkıştırılmış graf dizileri ve en kısa yol hesaplaması (Dijkstra; isteğe bağlı A*)
+        - Shapely: Kameraları en yakın yol kenarına oturtan uzamsal indeks (STRtree)
+        - pyproj: Düğüm ve kamera konumlarının UTM 36N (EPSG:32636) izdüşümü, metre cinsinden Öklid mesafeleri
         - Folium: İnteraktif harita görselleştirme
         - Streamlit: Web uygulama arayüzü
         """)
 
+# Isıtmayı sayfa çizilmeden, betik ilk kez çalıştığı anda başlat
+get_graph_warmup()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,64 @@
+"""Metrik (UTM) izdüşüm yardımcıları.
+
+Yakınlık ve tampon kontrolleri her seferinde enlem/boylamdan küresel
+trigonometri hesaplamak yerine UTM koordinatlarında düz Öklid aritmetiğiyle
+yapılır. Bolu UTM 36N diliminde (EPSG:32636) kalır; dilim grafın ortasına
+göre seçildiğinden başka bölgelerin karoları da doğru dilimi kullanır.
+
+Grafın tüm düğümleri ilk kullanımda bir kez izdüşürülür ve bitişik,
+salt okunur diziler olarak grafa bağlanır (``CompactGraph.derived``).
+"""
+import threading
+from typing import Tuple
+
+import numpy as np
+from pyproj import Transformer
+
+# Bolu merkezinin UTM dilimi
+DEFAULT_CRS = "EPSG:32636"
+
+# pyproj dönüştürücüleri iş parçacıkları arasında paylaşılmaz
+_local = threading.local()
+
+
+def utm_crs(lat: float, lon: float) -> str:
+    """Noktanın düştüğü UTM diliminin EPSG kodu (kuzey 326xx, güney 327xx)"""
+    zone = min(int((lon + 180) // 6) + 1, 60)
+    return f"EPSG:{(32600 if lat >= 0 else 32700) + zone}"
+
+
+def _transformer(crs: str) -> Transformer:
+    cache = getattr(_local, "transformers", None)
+    if cache is None:
+        cache = _local.transformers = {}
+    if crs not in cache:
+        cache[crs] = Transformer.from_crs("EPSG:4326", crs, always_xy=True)
+    return cache[crs]
+
+
+def to_metric(lats, lons, crs: str = DEFAULT_CRS) -> Tuple[np.ndarray, np.ndarray]:
+    """Enlem/boylam dizilerini metre cinsinden (x, y) UTM koordinatlarına çevirir"""
+    x, y = _transformer(crs).transform(np.asarray(lons, dtype=np.float64),
+                                       np.asarray(lats, dtype=np.float64))
+    return np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+
+
+class GraphProjection:
+    """Graf düğümlerinin UTM koordinatları"""
+
+    def __init__(self, graph):
+        if graph.num_nodes:
+            self.crs = utm_crs(float(np.mean(graph.lat)), float(np.mean(graph.lon)))
+        else:
+            self.crs = DEFAULT_CRS
+        self.x, self.y = to_metric(graph.lat, graph.lon, self.crs)
+        self.x.flags.writeable = False
+        self.y.flags.writeable = False
+
+    def to_metric(self, lats, lons) -> Tuple[np.ndarray, np.ndarray]:
+        return to_metric(lats, lons, self.crs)
+
+
+def graph_projection(graph) -> GraphProjection:
+    """Grafa bağlı düğüm izdüşümünü döner (ilk çağrıda kurulur)"""
+    return graph.derived("projection", lambda: GraphProjection(graph))
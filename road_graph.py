@@ -0,0 +1,444 @@
+"""Yol ağının NumPy dizileriyle tutulan sıkıştırılmış (CSR) gösterimi.
+
+OSMnx'in ``MultiDiGraph`` nesnesi her düğüm ve kenar için ayrı Python
+sözlükleri tutar; bu modül aynı ağı birkaç düz dizi halinde saklar:
+
+- ``node_ids``: OSM düğüm kimlikleri (artan sırada, ``int64``)
+- ``lat`` / ``lon``: düğüm koordinatları (``float64``)
+- ``indptr`` / ``indices``: CSR komşuluk listesi (``int32``)
+- ``lengths``: kenar uzunlukları, metre (``float32``)
+- ``speeds``: kenar hızları, km/sa (``float32``); OSM ``maxspeed`` ya da yol
+  türünün ortalamasından, bilinmiyorsa ``DEFAULT_SPEED_KPH``
+- ``geom_indptr`` / ``geom_lat`` / ``geom_lon``: kenarların ara noktaları
+  (uç düğümler hariç); ``e`` kenarının noktaları
+  ``geom_indptr[e]:geom_indptr[e + 1]`` aralığındadır
+
+Cache dosyası tek parça ikili bir dosyadır: sabit imza, JSON başlık ve
+ardından 64 bayta hizalanmış ham diziler. Dosya ``mmap`` ile salt okunur
+açılır; diziler doğrudan dosya sayfalarına bakan görünümlerdir, yani aynı
+dosyayı açan tüm Streamlit süreçleri aynı fiziksel belleği paylaşır.
+
+Başlık, grafın hangi ayarlarla üretildiğini (bbox, ``network_type``,
+kütüphane sürümleri) ve dizilerin SHA-256 özetini taşır. ``load`` bu
+bilgileri beklenen değerlerle karşılaştırır; uyuşmayan cache hiç
+okunmadan ``GraphCacheError`` ile reddedilir.
+"""
+import hashlib
+import json
+import os
+import struct
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Dünya yarıçapı (metre) - haversine hesapları için
+EARTH_RADIUS_M = 6371000.0
+
+GRAPH_FILE_MAGIC = b"HTSGRAPH"
+GRAPH_FILE_FORMAT = 4
+_ALIGNMENT = 64
+_ARRAY_NAMES = (
+    "node_ids", "lat", "lon", "indptr", "indices", "lengths",
+    "geom_indptr", "geom_lat", "geom_lon", "speeds",
+)
+
+# Hız bilgisi olmayan kenarlar için varsayılan (şehir içi sınırı), km/sa
+DEFAULT_SPEED_KPH = 50.0
+
+# Kenar ara noktaları: (geom_indptr, geom_lat, geom_lon)
+EdgeGeometry = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class GraphCacheError(ValueError):
+    """Cache dosyası bozuk, eski biçimde veya beklenen ayarlarla üretilmemiş"""
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _checksum(arrays) -> str:
+    digest = hashlib.sha256()
+    for array in arrays:
+        digest.update(memoryview(np.ascontiguousarray(array)).cast('B'))
+    return digest.hexdigest()
+
+
+def _read_header(buffer, path: str, magic: bytes = GRAPH_FILE_MAGIC,
+                 file_format: int = GRAPH_FILE_FORMAT) -> Dict[str, Any]:
+    prefix_size = len(magic) + 4
+    if bytes(buffer[:len(magic)]) != magic:
+        raise GraphCacheError(f"{path} beklenen türde bir cache dosyası değil")
+    (header_size,) = struct.unpack("<I", bytes(buffer[len(magic):prefix_size]))
+    header = json.loads(bytes(buffer[prefix_size:prefix_size + header_size]).decode('utf-8'))
+    if header.get("format") != file_format:
+        raise GraphCacheError(f"Desteklenmeyen cache biçimi: {header.get('format')}")
+    return header
+
+
+def write_array_file(path: str, magic: bytes, header: Dict[str, Any],
+                     arrays: Dict[str, np.ndarray]) -> None:
+    """İmza, JSON başlık ve 64 bayta hizalanmış dizilerden oluşan dosyayı yazar
+
+    Başlığa dizilerin tür/uzunluk/ofset bilgisi (``arrays``) eklenir. Dosya
+    geçici addan tek adımda yerine taşındığından yarıda kalan yazım eskisini bozmaz.
+    """
+    specs = {name: {"dtype": a.dtype.str, "length": len(a)} for name, a in arrays.items()}
+
+    # Başlık boyutu ofsetlere bağlı olduğundan ofsetleri sabitlenene kadar yeniden hesapla
+    header_size = 0
+    while True:
+        offset = _align(len(magic) + 4 + header_size)
+        for name, array in arrays.items():
+            specs[name]["offset"] = offset
+            offset = _align(offset + array.nbytes)
+        encoded = json.dumps({**header, "arrays": specs}).encode('utf-8')
+        if len(encoded) == header_size:
+            break
+        header_size = len(encoded)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(magic)
+        f.write(struct.pack("<I", header_size))
+        f.write(encoded)
+        for name, array in arrays.items():
+            f.seek(specs[name]["offset"])
+            f.write(array.tobytes())
+        # Sondaki boş diziler de dosya sınırları içinde kalsın
+        f.truncate(offset)
+    os.replace(tmp_path, path)
+
+
+def map_array_file(path: str, names: Iterable[str], magic: bytes = GRAPH_FILE_MAGIC,
+                   file_format: int = GRAPH_FILE_FORMAT) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """``write_array_file`` ile yazılmış dosyayı ``mmap`` ile açar: (başlık, dizi görünümleri)"""
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    header = _read_header(buffer, path, magic, file_format)
+    arrays = {}
+    for name in names:
+        spec = header["arrays"][name]
+        dtype = np.dtype(spec["dtype"])
+        start = spec["offset"]
+        end = start + spec["length"] * dtype.itemsize
+        if end > len(buffer):
+            raise GraphCacheError(f"Cache dosyası eksik yazılmış: {name}")
+        arrays[name] = buffer[start:end].view(dtype)
+    return header, arrays
+
+
+def take_geometry(geometry: EdgeGeometry, edges) -> EdgeGeometry:
+    """Verilen kenar indekslerinin ara noktalarını bu sırayla yeni düzensiz dizilere toplar"""
+    geom_indptr, geom_lat, geom_lon = geometry
+    edges = np.asarray(edges, dtype=np.int64)
+    starts = np.asarray(geom_indptr, dtype=np.int64)[edges]
+    counts = np.asarray(geom_indptr, dtype=np.int64)[edges + 1] - starts
+    new_indptr = np.zeros(len(edges) + 1, dtype=np.int64)
+    np.cumsum(counts, out=new_indptr[1:])
+    positions = np.repeat(starts - new_indptr[:-1], counts) + np.arange(new_indptr[-1])
+    return new_indptr, np.asarray(geom_lat)[positions], np.asarray(geom_lon)[positions]
+
+
+def concat_geometry(geometries: Iterable[EdgeGeometry]) -> EdgeGeometry:
+    """Birden fazla kenar listesinin ara noktalarını art arda ekler"""
+    geometries = list(geometries)
+    counts = np.concatenate([np.diff(g[0]) for g in geometries])
+    indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return (indptr,
+            np.concatenate([g[1] for g in geometries]),
+            np.concatenate([g[2] for g in geometries]))
+
+
+def read_metadata(path: str) -> Dict[str, Any]:
+    """Cache dosyasının yalnızca başlığındaki üst veriyi okur"""
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    return _read_header(buffer, path).get("metadata", {})
+
+
+def metadata_mismatches(metadata: Dict[str, Any], expected: Dict[str, Any]) -> List[str]:
+    """Beklenen üst veriyle uyuşmayan alanların açıklamalarını döner"""
+    problems = []
+    for key, value in expected.items():
+        if metadata.get(key) != value:
+            problems.append(f"{key}: cache={metadata.get(key)!r}, beklenen={value!r}")
+    return problems
+
+
+def _sorted_edge_keys(graph: "CompactGraph") -> Tuple[np.ndarray, np.ndarray]:
+    """Kenarların (kaynak * düğüm sayısı + hedef) anahtarları sıralı ve CSR indeksleri o sırayla"""
+    keys = graph.edge_sources().astype(np.int64) * graph.num_nodes + graph.indices
+    order = np.argsort(keys, kind='stable')
+    return keys[order], order
+
+
+class CompactGraph:
+    """CSR düzeninde yönlü yol ağı"""
+
+    def __init__(self, node_ids, lat, lon, indptr, indices, lengths,
+                 geom_indptr=None, geom_lat=None, geom_lon=None, metadata=None, speeds=None):
+        self.node_ids = np.asarray(node_ids, dtype=np.int64)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.indptr = np.asarray(indptr, dtype=np.int32)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.lengths = np.asarray(lengths, dtype=np.float32)
+        if geom_indptr is None:
+            geom_indptr = np.zeros(len(self.indices) + 1, dtype=np.int64)
+            geom_lat = geom_lon = np.empty(0, dtype=np.float64)
+        self.geom_indptr = np.asarray(geom_indptr, dtype=np.int64)
+        self.geom_lat = np.asarray(geom_lat, dtype=np.float64)
+        self.geom_lon = np.asarray(geom_lon, dtype=np.float64)
+        if speeds is None:
+            speeds = np.full(len(self.indices), DEFAULT_SPEED_KPH, dtype=np.float32)
+        self.speeds = np.asarray(speeds, dtype=np.float32)
+        # Grafın üretim ayarları (bbox, network_type, sürümler...)
+        self.metadata = dict(metadata or {})
+        # mmap ile açıldıysa kaynak dosya yolu ve dizilerin özeti
+        self.path = None
+        self.checksum = None
+        # Dizilerden türetilen ve ilk kullanımda bir kez kurulan yapılar
+        # (uzamsal indeksler, SciPy matrisi...); graf paylaşıldığı için kilitle korunur.
+        # Bir yapı kurulurken başka bir türetilmiş yapıya ihtiyaç duyabilir (RLock)
+        self._derived = {}
+        self._derived_lock = threading.RLock()
+
+    @classmethod
+    def from_networkx(cls, graph) -> "CompactGraph":
+        """OSMnx/NetworkX grafını CSR dizilerine dönüştürür"""
+        node_ids = np.fromiter(graph.nodes, dtype=np.int64, count=graph.number_of_nodes())
+        node_ids.sort()
+        lat = np.empty(len(node_ids), dtype=np.float64)
+        lon = np.empty(len(node_ids), dtype=np.float64)
+        for i, node in enumerate(node_ids.tolist()):
+            data = graph.nodes[node]
+            lat[i] = data['y']
+            lon[i] = data['x']
+
+        # Paralel kenarlardan yalnızca en kısası (ve onun çizgisi ve hızı) tutulur
+        best = {}
+        for u, v, data in graph.edges(data=True):
+            length = float(data.get('length', 0.0))
+            key = (u, v)
+            if key not in best or length < best[key][0]:
+                best[key] = (length, data.get('geometry'), float(data.get('speed_kph') or DEFAULT_SPEED_KPH))
+
+        pairs = np.array(list(best.keys()), dtype=np.int64).reshape(-1, 2)
+        lengths = np.array([value[0] for value in best.values()], dtype=np.float32)
+        # OSMnx çizgileri (boylam, enlem) sıralıdır; uç noktalar düğümlerin kendisidir
+        middles = [np.asarray(g.coords)[1:-1] if g is not None else np.empty((0, 2))
+                   for _, g, _ in best.values()]
+        geom_indptr = np.zeros(len(middles) + 1, dtype=np.int64)
+        np.cumsum([len(m) for m in middles], out=geom_indptr[1:])
+        points = np.concatenate(middles) if middles else np.empty((0, 2))
+        speeds = np.array([value[2] for value in best.values()], dtype=np.float32)
+        return cls.from_edges(node_ids, lat, lon, pairs[:, 0], pairs[:, 1], lengths,
+                              geometry=(geom_indptr, points[:, 1], points[:, 0]), speeds=speeds)
+
+    @classmethod
+    def from_edges(cls, node_ids, lat, lon, src_ids, dst_ids, lengths,
+                   geometry: Optional[EdgeGeometry] = None, speeds=None) -> "CompactGraph":
+        """Düğüm dizileri ve OSM kimlikleriyle verilen kenar listesinden CSR grafı kurar
+
+        ``node_ids`` artan sırada ve tekil olmalıdır; kenarlar kaynak düğüme göre sıralanır.
+        ``geometry`` ve ``speeds`` verilirse kenarlarla aynı sıradadır.
+        """
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        src = np.searchsorted(node_ids, np.asarray(src_ids, dtype=np.int64))
+        dst = np.searchsorted(node_ids, np.asarray(dst_ids, dtype=np.int64))
+        lengths = np.asarray(lengths, dtype=np.float32)
+
+        order = np.lexsort((dst, src))
+        src, dst, lengths = src[order], dst[order], lengths[order]
+        if speeds is not None:
+            speeds = np.asarray(speeds, dtype=np.float32)[order]
+        indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(node_ids)), out=indptr[1:])
+        if geometry is None:
+            return cls(node_ids, lat, lon, indptr, dst, lengths, speeds=speeds)
+        return cls(node_ids, lat, lon, indptr, dst, lengths, *take_geometry(geometry, order), speeds=speeds)
+
+    @classmethod
+    def load(cls, path: str, expected: Optional[Dict[str, Any]] = None,
+             verify: bool = True) -> "CompactGraph":
+        """Cache dosyasını ``mmap`` ile açar; diziler kopyalanmaz, seri durumdan çıkarılmaz
+
+        ``expected`` verilirse başlıktaki üst veri bu değerlerle karşılaştırılır ve
+        dizilere dokunulmadan reddedilir. ``verify`` dizilerin özetini doğrular.
+        """
+        if expected:
+            problems = metadata_mismatches(read_metadata(path), expected)
+            if problems:
+                raise GraphCacheError("Cache farklı ayarlarla üretilmiş (" + "; ".join(problems) + ")")
+
+        header, arrays = map_array_file(path, _ARRAY_NAMES)
+        metadata = header.get("metadata", {})
+
+        if verify and _checksum(arrays[name] for name in _ARRAY_NAMES) != header.get("checksum"):
+            raise GraphCacheError("Cache özeti (checksum) tutmuyor, dosya bozulmuş")
+
+        graph = cls(metadata=metadata, **arrays)
+        graph.path = os.path.abspath(path)
+        graph.checksum = header.get("checksum")
+        return graph
+
+    @classmethod
+    def _reopen(cls, path: str) -> "CompactGraph":
+        return cls.load(path, verify=False)
+
+    @classmethod
+    def _from_arrays(cls, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> "CompactGraph":
+        return cls(metadata=metadata, **arrays)
+
+    def save(self, path: str) -> None:
+        """Grafı mmap ile açılabilir ikili biçimde kaydeder (yarıda kalan yazımlar eski dosyayı bozmaz)"""
+        arrays = {name: np.ascontiguousarray(getattr(self, name)) for name in _ARRAY_NAMES}
+        checksum = _checksum(arrays[name] for name in _ARRAY_NAMES)
+        write_array_file(path, GRAPH_FILE_MAGIC, {
+            "format": GRAPH_FILE_FORMAT,
+            "metadata": self.metadata,
+            "checksum": checksum,
+        }, arrays)
+        self.checksum = checksum
+
+    def __reduce__(self):
+        # Dosyadan açılmış graf dizileri yerine yalnızca dosya yoluyla
+        # serileştirilir; karşı tarafta yeniden mmap edilir
+        if self.path is not None:
+            return (type(self)._reopen, (self.path,))
+        # Diziler adlarıyla verilir; kurucudaki sıraları dosyadaki sıradan farklıdır
+        return (type(self)._from_arrays, ({name: getattr(self, name) for name in _ARRAY_NAMES}, self.metadata))
+
+    @property
+    def geometry(self) -> EdgeGeometry:
+        return self.geom_indptr, self.geom_lat, self.geom_lon
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.indices)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in _ARRAY_NAMES)
+
+    def edge_sources(self) -> np.ndarray:
+        """Her kenarın kaynak düğüm indeksi (CSR satırlarının açılmış hali)"""
+        return np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.indptr))
+
+    def index_of(self, node_id) -> int:
+        """OSM düğüm kimliğinin dizi indeksini döner, yoksa -1"""
+        if node_id is None:
+            return -1
+        try:
+            node_id = int(node_id)
+        except (TypeError, ValueError):
+            return -1
+        i = int(np.searchsorted(self.node_ids, node_id))
+        if i < len(self.node_ids) and self.node_ids[i] == node_id:
+            return i
+        return -1
+
+    def indices_of(self, node_ids: Iterable) -> np.ndarray:
+        """OSM düğüm kimliklerinin dizi indeksleri (toplu ``index_of``), grafta olmayanlar -1"""
+        ids = np.array([-1 if n is None else n for n in node_ids], dtype=np.int64)
+        if not self.num_nodes:
+            return np.full(len(ids), -1, dtype=np.int64)
+        i = np.minimum(np.searchsorted(self.node_ids, ids), self.num_nodes - 1)
+        return np.where(self.node_ids[i] == ids, i, -1)
+
+    def has_node(self, node_id) -> bool:
+        return self.index_of(node_id) >= 0
+
+    def derived(self, key: str, build: Callable[[], Any]) -> Any:
+        """Grafa bağlı türetilmiş yapıyı döner; yoksa ``build`` ile bir kez kurar
+
+        Graf tüm oturumlarca paylaşılan salt okunur bir nesnedir; türetilmiş yapılar
+        da onunla birlikte yaşar ve graf değiştiğinde (yenileme) kendiliğinden düşer.
+        """
+        value = self._derived.get(key)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = self._derived[key] = build()
+        return value
+
+    def freeze(self) -> "CompactGraph":
+        """Dizileri salt okunur yapar (paylaşılan graf yanlışlıkla değiştirilemesin)"""
+        for name in _ARRAY_NAMES:
+            getattr(self, name).flags.writeable = False
+        return self
+
+    def edge_index(self, source: int, target: int) -> int:
+        """``source -> target`` kenarının CSR indeksini döner (dizi indeksleriyle), yoksa -1"""
+        start, end = int(self.indptr[source]), int(self.indptr[source + 1])
+        hits = np.flatnonzero(self.indices[start:end] == target)
+        return start + int(hits[0]) if len(hits) else -1
+
+    def edge_between(self, source_id, target_id) -> int:
+        """OSM kimlikleriyle verilen ``source -> target`` kenarının CSR indeksi, yoksa -1"""
+        source, target = self.index_of(source_id), self.index_of(target_id)
+        if source < 0 or target < 0:
+            return -1
+        return self.edge_index(source, target)
+
+    def edges_between(self, source_ids: Iterable, target_ids: Iterable) -> np.ndarray:
+        """OSM kimlik çiftleriyle verilen kenarların CSR indeksleri (toplu ``edge_between``), yoksa -1"""
+        source, target = self.indices_of(source_ids), self.indices_of(target_ids)
+        if not self.num_edges:
+            return np.full(len(source), -1, dtype=np.int64)
+        # Kenarlar (kaynak, hedef) anahtarına göre bir kez sıralanır; paralel kenarlarda ilki döner
+        keys, order = self.derived("edge_keys", lambda: _sorted_edge_keys(self))
+        wanted = source * self.num_nodes + target
+        pos = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+        return np.where((source >= 0) & (target >= 0) & (keys[pos] == wanted), order[pos], -1)
+
+    def edge_coords(self, edge: int, source: int) -> List[List[float]]:
+        """Kenarın kaynak düğümü ve ara noktalarıyla [enlem, boylam] listesi (hedef hariç)"""
+        start, end = int(self.geom_indptr[edge]), int(self.geom_indptr[edge + 1])
+        points = [[float(self.lat[source]), float(self.lon[source])]]
+        points.extend(np.column_stack((self.geom_lat[start:end], self.geom_lon[start:end])).tolist())
+        return points
+
+    def route_coords(self, route_nodes: Iterable) -> List[List[float]]:
+        """Rotanın kenar çizgileri açılmış [enlem, boylam] koordinatları"""
+        idx = [i for i in (self.index_of(n) for n in route_nodes) if i >= 0]
+        coords = []
+        for u, v in zip(idx, idx[1:]):
+            edge = self.edge_index(u, v)
+            if edge >= 0:
+                coords.extend(self.edge_coords(edge, u))
+            else:
+                coords.append([float(self.lat[u]), float(self.lon[u])])
+        if idx:
+            coords.append([float(self.lat[idx[-1]]), float(self.lon[idx[-1]])])
+        return coords
+
+    def travel_times(self) -> np.ndarray:
+        """Kenarların hızlarına göre geçiş süreleri, saniye (bir kez hesaplanır)"""
+        return self.derived("travel_times", lambda: self.lengths.astype(np.float64)
+                            / (np.maximum(self.speeds, 1.0) / 3.6))
+
+    def to_csr_matrix(self):
+        """Rota hesapları için SciPy seyrek matrisi (diziler kopyalanmaz, bir kez kurulur)"""
+        from scipy.sparse import csr_matrix
+        return self.derived("csr", lambda: csr_matrix(
+            (self.lengths, self.indices, self.indptr),
+            shape=(self.num_nodes, self.num_nodes)
+        ))
+
+    def warm(self) -> "CompactGraph":
+        """Dizileri dondurur ve türetilmiş yapıları (SciPy matrisi, UTM koordinatları, düğüm ve kenar indeksleri) ilk istekten önce kurar"""
+        from projection import graph_projection
+        from spatial_index import edge_snap_index, node_index
+        self.freeze()
+        self.to_csr_matrix()
+        graph_projection(self)
+        node_index(self)
+        edge_snap_index(self)
+        return self
@@ -0,0 +1,202 @@
+"""Coğrafi karolara bölünmüş, ihtiyaç oldukça yüklenen yol ağı.
+
+İl geneli veya birden fazla şehir tek bir graf olarak yüklenemeyecek kadar
+büyük olduğunda ağ, sabit boyutlu enlem/boylam karolarına bölünür. Her karo
+kendi ``CompactGraph`` cache dosyasıdır ve karodaki düğümlerden çıkan tüm
+kenarları içerir; komşu karodaki hedef düğümler "misafir" düğüm olarak
+kopyalanır. Kameraların veya rotanın dokunduğu karolar mmap ile açılıp tek
+bir çalışma grafında birleştirilir; bellekte en fazla ``max_tiles`` karo
+tutulur (LRU). Birleşik graflar karoların kopyasını taşıdığından onlar da
+aynı sınıra tabidir: tek bir birleşik graf ``max_tiles`` karodan fazlasını
+kapsayamaz ve saklanan birleşik grafların karo toplamı ``max_tiles``ı aşmaz.
+
+Dizin yapısı::
+
+    graph_tiles/
+        index.json          # karo boyutu, üst veri ve karo listesi
+        tile_<ix>_<iy>.bin  # CompactGraph cache dosyaları
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from road_graph import (
+    CompactGraph, GraphCacheError, concat_geometry, metadata_mismatches, take_geometry
+)
+
+TILE_INDEX_FILE = "index.json"
+DEFAULT_TILE_SIZE = 0.05  # derece (~5.5 km)
+
+TileKey = Tuple[int, int]
+
+
+class TileLimitError(ValueError):
+    """İstenen noktalar bellekte tutulabilecek karo sayısından fazlasına yayılıyor"""
+
+
+def tile_key(lat: float, lon: float, tile_size: float) -> TileKey:
+    """Noktanın düştüğü karonun (ix, iy) anahtarı"""
+    return int(math.floor(lon / tile_size)), int(math.floor(lat / tile_size))
+
+
+def _tile_file(key: TileKey) -> str:
+    return f"tile_{key[0]}_{key[1]}.bin"
+
+
+def write_tiles(graph: CompactGraph, directory: str,
+                tile_size: float = DEFAULT_TILE_SIZE) -> Dict[TileKey, CompactGraph]:
+    """Grafı karolara bölüp her karoyu ayrı cache dosyası olarak yazar"""
+    os.makedirs(directory, exist_ok=True)
+    ix = np.floor(graph.lon / tile_size).astype(np.int64)
+    iy = np.floor(graph.lat / tile_size).astype(np.int64)
+    edge_src = graph.edge_sources()
+
+    tiles = {}
+    for key in sorted(set(zip(ix.tolist(), iy.tolist()))):
+        owned = np.flatnonzero((ix == key[0]) & (iy == key[1]))
+        edges = np.flatnonzero(np.isin(edge_src, owned))
+        src = edge_src[edges]
+        dst = graph.indices[edges]
+        # Karonun kendi düğümleri + komşu karolara giden kenarların hedefleri
+        nodes = np.union1d(owned, dst)
+        tile = CompactGraph.from_edges(
+            graph.node_ids[nodes], graph.lat[nodes], graph.lon[nodes],
+            graph.node_ids[src], graph.node_ids[dst], graph.lengths[edges],
+            geometry=take_geometry(graph.geometry, edges), speeds=graph.speeds[edges]
+        )
+        south, west = key[1] * tile_size, key[0] * tile_size
+        tile.metadata = {
+            **graph.metadata,
+            "bbox": [south + tile_size, south, west + tile_size, west],
+            "tile": list(key),
+        }
+        tile.save(os.path.join(directory, _tile_file(key)))
+        tiles[key] = tile
+
+    index = {
+        "tile_size": tile_size,
+        "metadata": {k: v for k, v in graph.metadata.items() if k != "bbox"},
+        "tiles": {f"{k[0]}_{k[1]}": {"nodes": int(t.num_nodes), "edges": int(t.num_edges)}
+                  for k, t in tiles.items()},
+    }
+    tmp_path = os.path.join(directory, TILE_INDEX_FILE + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(directory, TILE_INDEX_FILE))
+    return tiles
+
+
+def merge_graphs(graphs: Sequence[CompactGraph]) -> CompactGraph:
+    """Karoları tek grafta birleştirir (misafir düğüm kopyaları tekilleştirilir)"""
+    node_ids = np.concatenate([g.node_ids for g in graphs])
+    lat = np.concatenate([g.lat for g in graphs])
+    lon = np.concatenate([g.lon for g in graphs])
+    node_ids, first = np.unique(node_ids, return_index=True)
+
+    src = np.concatenate([g.node_ids[g.edge_sources()] for g in graphs])
+    dst = np.concatenate([g.node_ids[g.indices] for g in graphs])
+    lengths = np.concatenate([g.lengths for g in graphs])
+    speeds = np.concatenate([g.speeds for g in graphs])
+    return CompactGraph.from_edges(node_ids, lat[first], lon[first], src, dst, lengths,
+                                   geometry=concat_geometry(g.geometry for g in graphs), speeds=speeds)
+
+
+class TileStore:
+    """Karo dizinini açar; karoları istendikçe yükler ve LRU ile sınırlar"""
+
+    def __init__(self, directory: str, max_tiles: int = 16, max_merged: int = 4,
+                 expected: Optional[Dict[str, Any]] = None):
+        self.directory = directory
+        self.max_tiles = max_tiles
+        self.max_merged = max_merged
+        self.expected = {k: v for k, v in (expected or {}).items() if k != "bbox"}
+
+        with open(os.path.join(directory, TILE_INDEX_FILE), 'rb') as f:
+            raw = f.read()
+        index = json.loads(raw.decode('utf-8'))
+        # Karolar yeniden üretildiğinde değişir; kamera eşlemelerinin hangi ağa ait olduğunu gösterir
+        self.signature = hashlib.sha256(raw).hexdigest()
+        problems = metadata_mismatches(index.get("metadata", {}), self.expected)
+        if problems:
+            raise GraphCacheError("Karolar farklı ayarlarla üretilmiş (" + "; ".join(problems) + ")")
+
+        self.tile_size = float(index["tile_size"])
+        self.available: Set[TileKey] = {
+            tuple(int(part) for part in name.split("_")) for name in index["tiles"]
+        }
+        self._tiles: "OrderedDict[TileKey, CompactGraph]" = OrderedDict()
+        self._merged: "OrderedDict[frozenset, CompactGraph]" = OrderedDict()
+        # Streamlit oturumları aynı depoyu farklı iş parçacıklarından kullanır
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return os.path.exists(os.path.join(directory, TILE_INDEX_FILE))
+
+    @property
+    def resident_tiles(self) -> int:
+        return len(self._tiles)
+
+    def tile(self, key: TileKey) -> Optional[CompactGraph]:
+        """Karoyu döner; bellekte değilse diskten açar, gerekirse en eskisini bırakır"""
+        if key not in self.available:
+            return None
+        with self._lock:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                return self._tiles[key]
+
+            tile = CompactGraph.load(os.path.join(self.directory, _tile_file(key)), expected=self.expected)
+            self._tiles[key] = tile
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+            return tile
+
+    def keys_for_points(self, points: Iterable[Tuple[float, float]], margin: int = 1) -> Set[TileKey]:
+        """(enlem, boylam) noktalarının sınır kutusunu ``margin`` karo payla kapsayan mevcut karolar"""
+        keys = [tile_key(lat, lon, self.tile_size) for lat, lon in points]
+        if not keys:
+            return set()
+        xs = [k[0] for k in keys]
+        ys = [k[1] for k in keys]
+        return {
+            (x, y)
+            for x in range(min(xs) - margin, max(xs) + margin + 1)
+            for y in range(min(ys) - margin, max(ys) + margin + 1)
+            if (x, y) in self.available
+        }
+
+    def graph_for_points(self, points: Iterable[Tuple[float, float]],
+                         margin: int = 1) -> Optional[CompactGraph]:
+        """Noktaları kapsayan karoları yükleyip birleşik çalışma grafını döner"""
+        points = list(points)
+        keys = frozenset(self.keys_for_points(points, margin))
+        if len(keys) > self.max_tiles and margin > 0:
+            # Önce kenar payından vazgeçilir: yalnızca noktaların sınır kutusundaki karolar
+            keys = frozenset(self.keys_for_points(points, 0))
+        if not keys:
+            return None
+        if len(keys) > self.max_tiles:
+            raise TileLimitError(f"Noktalar {len(keys)} karoya yayılıyor; en fazla {self.max_tiles} karo "
+                                 "birlikte yüklenebilir")
+        with self._lock:
+            if keys in self._merged:
+                self._merged.move_to_end(keys)
+                return self._merged[keys]
+
+            tiles = [self.tile(key) for key in sorted(keys)]
+            graph = tiles[0] if len(tiles) == 1 else merge_graphs(tiles).freeze()
+            self._merged[keys] = graph
+            # Tek karolu girdiler kopya değildir; birden fazla karoyu birleştirenler karo sayısınca yer tutar
+            while len(self._merged) > 1 and (
+                len(self._merged) > self.max_merged
+                or sum(len(k) for k in self._merged if len(k) > 1) > self.max_tiles
+            ):
+                self._merged.popitem(last=False)
+            return graph
@@ -0,0 +1,78 @@
+"""Hesaplanmış rotalar için süreç içi LRU önbellek.
+
+Aynı kamera çifti tekrar seçildiğinde ya da Streamlit sayfayı yeniden
+çalıştırdığında rota yeniden hesaplanmaz. Anahtar (başlangıç düğümü, bitiş
+düğümü, ağırlık profili)dır; değer rota düğümleri ve uzunluğudur. Yol
+bulunamayan çiftler de saklanır.
+
+Önbellek süreç başına tektir (``st.cache_resource``) ve tüm oturumlarca
+paylaşılır. Her sorguyla birlikte yol ağının sürümü (``graph_signature``)
+verilir; sürüm değişmişse tüm kayıtlar düşer.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+DEFAULT_MAX_ROUTES = 256
+
+# (rota düğümleri veya None, uzunluk metre)
+RouteEntry = Tuple[Optional[List[int]], float]
+RouteKey = Tuple[Hashable, Hashable, str]
+
+
+class RouteCache:
+    """En son kullanılan ``max_routes`` rotayı tutar; isabet/ıska sayılarını izler"""
+
+    def __init__(self, max_routes: int = DEFAULT_MAX_ROUTES):
+        self.max_routes = max_routes
+        self.version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self._routes: "OrderedDict[RouteKey, RouteEntry]" = OrderedDict()
+        # Streamlit oturumları aynı önbelleği farklı iş parçacıklarından kullanır
+        self._lock = threading.Lock()
+
+    def _check_version(self, version: Optional[str]) -> None:
+        if version != self.version:
+            self._routes.clear()
+            self.version = version
+
+    def get(self, version: Optional[str], key: RouteKey) -> Optional[RouteEntry]:
+        """Kayıtlı rotayı döner (yoksa None); yol ağı sürümü değişmişse önce önbelleği boşaltır"""
+        with self._lock:
+            self._check_version(version)
+            entry = self._routes.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._routes.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, version: Optional[str], key: RouteKey, entry: RouteEntry) -> None:
+        """Rotayı kaydeder, gerekirse en eski kaydı bırakır"""
+        with self._lock:
+            self._check_version(version)
+            self._routes[key] = entry
+            self._routes.move_to_end(key)
+            while len(self._routes) > self.max_routes:
+                self._routes.popitem(last=False)
+
+    def get_or_compute(self, version: Optional[str], key: RouteKey,
+                       compute: Callable[[], RouteEntry]) -> RouteEntry:
+        """Kayıtlıysa döner, değilse ``compute`` ile hesaplayıp kaydeder (hesap kilit dışında yapılır)"""
+        entry = self.get(version, key)
+        if entry is None:
+            entry = compute()
+            self.put(version, key, entry)
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "routes": len(self._routes),
+            "max_routes": self.max_routes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,182 @@
+"""Rota üzerindeki ve yakınındaki kameraların bulunması.
+
+Rota üzerindeki kameralar kamera listesi taranarak değil, kalıcı düğüm ->
+kameralar ve kenar -> kameralar ters indeksiyle (``camera_index``) bulunur:
+rotanın düğüm ve kenar kümeleriyle indeks anahtarlarının kesişimidir.
+
+Kameraların yol üzerindeki konumları ve rota çizgisi grafın UTM düzlemine
+(``projection``) taşınır. Rota üzerinde olmayan kameralar tek tek taranmaz:
+kamera noktaları bir ``STRtree`` ile indekslenir ve yalnızca rota çizgisinin
+tampon mesafesi içindekiler aday olur. Adayların rotaya uzaklığı rota
+noktalarına değil, rota parçalarına (ardışık iki nokta arasındaki doğru
+parçaları) olan tam dik uzaklıktır; parçalar ayrı bir ``STRtree`` ile
+indekslendiğinden her aday için tüm parçalar taranmaz.
+
+Sonuçlar rota boyunca karşılaşılma sırasıyla döner: rota tek geçişte
+açılarak (``RouteProfile``) her noktanın başlangıçtan uzaklığı ve kenar
+hızlarından beklenen varış süresi çıkarılır; her kamera rotadaki konumuna
+(kenar üzerindeki kesirli konumu ya da rotaya izdüşümü) göre yerleştirilir.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+
+from camera_index import CameraIndex, edge_key
+from camera_snap import camera_edge, camera_positions
+from projection import graph_projection
+
+Camera = Dict[str, Any]
+
+
+class RouteProfile:
+    """Rotanın açılmış hali: UTM noktaları ve her noktanın rota boyunca mesafesi/varış süresi
+
+    Rota düğümleri ve kenarları tek geçişte dolaşılır; ``steps`` rota
+    kenarlarının (yönsüz anahtar -> sıra), ``positions`` rota düğümlerinin
+    sıralarını tutar. ``node_distance``/``node_time`` düğüm başına, ``distance``/
+    ``time`` açılmış nokta başına metre ve saniyedir.
+    """
+
+    def __init__(self, graph, route_nodes: Sequence):
+        idx = [i for i in (graph.index_of(n) for n in route_nodes) if i >= 0]
+        node_ids = graph.node_ids[idx].tolist()
+        travel_times = graph.travel_times()
+        lats, lons, owners = [], [], []
+        lengths, times = [], []
+        self.steps: Dict[Tuple[int, int], int] = {}
+        self.positions: Dict[int, int] = {}
+
+        for k, (u, v) in enumerate(zip(idx, idx[1:])):
+            self.positions.setdefault(node_ids[k], k)
+            self.steps.setdefault(edge_key(node_ids[k], node_ids[k + 1]), k)
+            edge = graph.edge_index(u, v)
+            if edge >= 0:
+                coords = graph.edge_coords(edge, u)
+                lengths.append(float(graph.lengths[edge]))
+                times.append(float(travel_times[edge]))
+            else:
+                coords = [[float(graph.lat[u]), float(graph.lon[u])]]
+                lengths.append(0.0)
+                times.append(0.0)
+            lats.extend(c[0] for c in coords)
+            lons.extend(c[1] for c in coords)
+            owners.extend([k] * len(coords))
+        if idx:
+            self.positions.setdefault(node_ids[-1], len(idx) - 1)
+            lats.append(float(graph.lat[idx[-1]]))
+            lons.append(float(graph.lon[idx[-1]]))
+            owners.append(len(idx) - 1)
+
+        self.route_nodes = node_ids
+        x, y = graph_projection(graph).to_metric(lats, lons)
+        self.points = np.column_stack((x, y))
+        self.step_length = np.array(lengths + [0.0])
+        self.step_time = np.array(times + [0.0])
+        self.node_distance = np.concatenate(([0.0], np.cumsum(lengths)))
+        self.node_time = np.concatenate(([0.0], np.cumsum(times)))
+
+        # Kenar içindeki noktalar, kenar uzunluğunu çizgi üzerindeki konumlarına göre paylaşır
+        owners = np.asarray(owners, dtype=np.int64)
+        along = np.cumsum(np.hypot(*np.diff(self.points, axis=0).T)) if len(owners) > 1 else np.empty(0)
+        along = np.concatenate(([0.0], along))[:len(owners)]
+        first = np.searchsorted(owners, np.arange(len(idx)))
+        start = along[first]
+        span = (np.append(start[1:], along[-1:]) - start)[owners]
+        fraction = np.divide(along - start[owners], span, out=np.zeros_like(along), where=span > 0)
+        self.distance = self.node_distance[owners] + fraction * self.step_length[owners]
+        self.time = self.node_time[owners] + fraction * self.step_time[owners]
+
+    def at_step(self, step: int, fraction: float) -> Tuple[float, float]:
+        """``step``. rota kenarında kesirli konumun (mesafe, süre) değeri"""
+        return (float(self.node_distance[step] + fraction * self.step_length[step]),
+                float(self.node_time[step] + fraction * self.step_time[step]))
+
+    def at_segment(self, segment: int, fraction: float) -> Tuple[float, float]:
+        """Açılmış rotanın ``segment``. parçasında kesirli konumun (mesafe, süre) değeri"""
+        nxt = min(segment + 1, len(self.distance) - 1)
+        return (float(self.distance[segment] + fraction * (self.distance[nxt] - self.distance[segment])),
+                float(self.time[segment] + fraction * (self.time[nxt] - self.time[segment])))
+
+    def camera_position(self, graph, camera: Camera) -> Tuple[float, float]:
+        """Rota üzerindeki kameranın (mesafe, süre) değeri: kenarındaki konumu ya da düğümü"""
+        if camera_edge(graph, camera) >= 0:
+            source, target = camera['edge']
+            step = self.steps.get(edge_key(source, target))
+            if step is not None:
+                # Kenarın rotadaki yönü kaydedilen yönün tersiyse konum da tersine döner
+                offset = float(camera.get('edge_offset', 0.0))
+                forward = self.route_nodes[step] == source
+                return self.at_step(step, offset if forward else 1.0 - offset)
+        k = self.positions.get(camera.get('node_id'), 0)
+        return float(self.node_distance[k]), float(self.node_time[k])
+
+
+def route_segments(points: np.ndarray) -> np.ndarray:
+    """Rota noktalarından ardışık doğru parçaları (tek noktalı rotada nokta) geometrileri"""
+    if len(points) == 1:
+        return shapely.points(points)
+    return shapely.linestrings(np.stack((points[:-1], points[1:]), axis=1))
+
+
+def find_cameras_on_route(graph, route_nodes: Sequence, cameras: Sequence[Camera],
+                          buffer_distance: float = 0.1,
+                          index: Optional[CameraIndex] = None) -> List[Camera]:
+    """Rota üzerindeki veya ``buffer_distance`` km yakınındaki kameralar, rota boyunca karşılaşılma sırasıyla
+
+    Her kameraya ``on_route``, rotaya uzaklık ``distance_to_route`` (km), başlangıçtan
+    rota boyunca mesafe ``distance_along_route`` (km) ve kenar hızlarına göre beklenen
+    varış süresi ``arrival_offset`` (saniye) eklenir. ``index`` verilmezse kameralardan kurulur.
+    """
+    if not route_nodes or not cameras:
+        return []
+
+    if index is None:
+        index = CameraIndex.from_cameras(cameras)
+    position = {camera['name']: i for i, camera in enumerate(cameras)}
+
+    # Kenara oturtulmuş kameralar, rota kenarlarından birindeyse (iki yönde de) rota üzerindedir;
+    # rotanın uç düğümlerindeki kameralar da öyle
+    names = index.on_edges(zip(route_nodes, route_nodes[1:]))
+    names |= index.at_nodes((route_nodes[0], route_nodes[-1]))
+    # Ara düğümlerde ise yalnızca düğümle eşlenmiş (ya da kenarı bu ağda olmayan) kameralar
+    for name in index.at_nodes(route_nodes) - names:
+        if name in position and camera_edge(graph, cameras[position[name]]) < 0:
+            names.add(name)
+    on_route = np.zeros(len(cameras), dtype=bool)
+    on_route[[position[name] for name in names if name in position]] = True
+
+    profile = RouteProfile(graph, route_nodes)
+    route_cameras = []
+    for i in np.flatnonzero(on_route).tolist():
+        distance, time = profile.camera_position(graph, cameras[i])
+        route_cameras.append({**cameras[i], "on_route": True, "distance_to_route": 0,
+                              "distance_along_route": distance / 1000, "arrival_offset": time})
+
+    # Rotaya yakınlık: yalnızca rota çizgisinin tamponuna düşen kameralara bakılır
+    points = profile.points
+    camera_x, camera_y = camera_positions(graph, cameras)
+    off_route = np.flatnonzero(~on_route & ~np.isnan(camera_x))
+    if len(points) and len(off_route):
+        buffer_m = buffer_distance * 1000
+        route = shapely.linestrings(points) if len(points) > 1 else shapely.points(points[0])
+        tree = shapely.STRtree(shapely.points(camera_x[off_route], camera_y[off_route]))
+        candidates = off_route[np.sort(tree.query(route, predicate="dwithin", distance=buffer_m))]
+        # Adaylar için en yakın rota parçasına dik uzaklık ve o parça üzerindeki izdüşümü
+        segments = route_segments(points)
+        candidate_points = shapely.points(camera_x[candidates], camera_y[candidates])
+        (which, nearest), distances = shapely.STRtree(segments).query_nearest(
+            candidate_points, return_distance=True, all_matches=False
+        )
+        fractions = shapely.line_locate_point(segments[nearest], candidate_points[which], normalized=True) \
+            if len(points) > 1 else np.zeros(len(which))
+        for i, segment, fraction, distance in zip(candidates[which].tolist(), nearest.tolist(),
+                                                  np.nan_to_num(fractions).tolist(), distances.tolist()):
+            if distance <= buffer_m:
+                along, time = profile.at_segment(segment, fraction)
+                route_cameras.append({**cameras[i], "on_route": False, "distance_to_route": distance / 1000,
+                                      "distance_along_route": along / 1000, "arrival_offset": time})
+
+    # Rota boyunca karşılaşılma sırası; aynı noktada rota üzerindekiler önce
+    route_cameras.sort(key=lambda x: (x['distance_along_route'], not x['on_route'], x['distance_to_route']))
+    return route_cameras
@@ -0,0 +1,124 @@
+"""Sıkıştırılmış yol ağı (``CompactGraph``) üzerinde rota hesapları.
+
+İki yöntem vardır; ikisi de aynı en kısa yolu bulur:
+
+- ``dijkstra``: SciPy'nin C ile yazılmış Dijkstra'sı; kaynaktan tüm ağa
+  yayılır, küçük şehir graflarında en hızlısıdır.
+- ``astar``: hedefe olan büyük daire mesafesini sezgisel olarak kullanan A*;
+  aramayı hedef yönüne çevirir ve hedefe ulaşınca durur. Kenar uzunlukları
+  hiçbir zaman iki uç arasındaki kuş uçuşu mesafeden kısa olmadığından
+  sezgisel kabul edilebilirdir, yani bulunan yol yine en kısa yoldur.
+"""
+import heapq
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from geo_distance import one_to_many
+from road_graph import CompactGraph
+
+# Rota yöntemleri ve arayüzdeki adları
+ROUTE_METHODS = {
+    "dijkstra": "Dijkstra",
+    "astar": "A* (büyük daire sezgiseli)",
+}
+DEFAULT_ROUTE_METHOD = "dijkstra"
+
+# Kenar ağırlığı profili: tüm yöntemler kenar uzunluğuyla (metre) en kısa yolu bulur
+LENGTH_PROFILE = "length"
+
+# float32 uzunluklardaki yuvarlama sezgiseli kabul edilemez yapmasın diye küçük pay
+_HEURISTIC_SLACK = 0.999
+
+# Bu kadar dereceye sığan graflarda sezgisel eşdikdörtgen yaklaşımla hesaplanır; bağıl hatası
+# (2 derecede en çok ~1e-4) yukarıdaki payın içinde kalır, daha geniş graflarda haversine kullanılır
+_FAST_HEURISTIC_SPAN = 2.0
+
+
+def _search_arrays(graph: CompactGraph):
+    """Öncelik kuyruğu döngüsü için Python listeleri ve sezgiselin hızlı yoldan hesaplanıp hesaplanmayacağı
+    (grafa bağlı, bir kez kurulur)"""
+    def build():
+        fast = bool(graph.num_nodes) and max(np.ptp(graph.lat), np.ptp(graph.lon)) <= _FAST_HEURISTIC_SPAN
+        return graph.indptr.tolist(), graph.indices.tolist(), graph.lengths.tolist(), fast
+    return graph.derived("search_arrays", build)
+
+
+def astar_search(graph: CompactGraph, source: int, target: int,
+                 heuristic: bool = True) -> Tuple[Optional[List[int]], int]:
+    """Dizi indeksleriyle A* araması; (yol indeksleri veya None, genişletilen düğüm sayısı)
+
+    ``heuristic=False`` aynı döngüyü sezgisiz, yani hedefte duran Dijkstra olarak çalıştırır.
+    """
+    indptr, indices, lengths, fast = _search_arrays(graph)
+    if heuristic:
+        # Tüm düğümlerin hedefe kuş uçuşu mesafesi tek NumPy çağrısıyla; döngü yalnızca okur
+        estimate = (one_to_many(graph.lat[target], graph.lon[target], graph.lat, graph.lon, fast=fast)
+                    * _HEURISTIC_SLACK).tolist()
+    else:
+        estimate = [0.0] * graph.num_nodes
+
+    dist = {source: 0.0}
+    pred = {source: -1}
+    closed = set()
+    heap = [(estimate[source], source)]
+    expanded = 0
+    while heap:
+        _, u = heapq.heappop(heap)
+        if u in closed:
+            continue
+        closed.add(u)
+        expanded += 1
+        if u == target:
+            path = [u]
+            while pred[path[-1]] >= 0:
+                path.append(pred[path[-1]])
+            path.reverse()
+            return path, expanded
+        du = dist[u]
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            nd = du + lengths[e]
+            if nd < dist.get(v, math.inf):
+                dist[v] = nd
+                pred[v] = u
+                heapq.heappush(heap, (nd + estimate[v], v))
+    return None, expanded
+
+
+def shortest_path(graph: CompactGraph, start_node, end_node,
+                  method: str = DEFAULT_ROUTE_METHOD) -> Optional[List[int]]:
+    """İki OSM düğümü arasındaki en kısa yolu (uzunluk ağırlıklı) döner, yol yoksa None"""
+    if method not in ROUTE_METHODS:
+        raise ValueError(f"Bilinmeyen rota yöntemi: {method}")
+    source = graph.index_of(start_node)
+    target = graph.index_of(end_node)
+    if source < 0 or target < 0:
+        return None
+
+    if method == "astar":
+        path, _ = astar_search(graph, source, target)
+        return None if path is None else graph.node_ids[path].tolist()
+
+    dist, pred = dijkstra(
+        graph.to_csr_matrix(), directed=True, indices=source, return_predecessors=True
+    )
+    if not np.isfinite(dist[target]):
+        return None
+
+    path = [target]
+    while path[-1] != source:
+        path.append(int(pred[path[-1]]))
+    path.reverse()
+    return graph.node_ids[path].tolist()
+
+
+def route_length(graph: CompactGraph, route_nodes: Optional[List[int]]) -> float:
+    """OSM düğümleriyle verilen rotanın uzunluğu, metre (rota yoksa inf)"""
+    if route_nodes is None:
+        return float("inf")
+    idx = [graph.index_of(n) for n in route_nodes]
+    edges = [graph.edge_index(u, v) for u, v in zip(idx, idx[1:]) if u >= 0 and v >= 0]
+    return float(sum(float(graph.lengths[e]) for e in edges if e >= 0))
@@ -0,0 +1,113 @@
+"""Yol ağı düğümleri ve kenarları için kalıcı uzamsal indeksler.
+
+Düğümler birim küre üzerindeki 3B noktalara çevrilir; bu uzayda kiriş
+(düz çizgi) mesafesi büyük daire mesafesiyle aynı sırayı verdiğinden en
+yakın komşu, haversine ile bulunanla birebir aynıdır.
+
+Kenarlar ara noktalarıyla birlikte çizgi olarak UTM düzlemine
+(``projection``) taşınır ve Shapely ``STRtree`` ile
+indekslenir; bir nokta en yakın kenara, kenar üzerindeki kesirli konumu ve
+dik uzaklığıyla eşlenir.
+
+İndeksler grafla birlikte bir kez kurulur (``CompactGraph.derived``) ve tüm
+oturumlarca paylaşılır; tekli ve vektörel toplu sorgular aynı ağacı kullanır.
+"""
+from typing import Tuple
+
+import numpy as np
+import shapely
+from scipy.spatial import cKDTree
+
+from projection import graph_projection
+from road_graph import EARTH_RADIUS_M
+
+
+def _unit_vectors(lat, lon) -> np.ndarray:
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def _chord_to_meters(chord: np.ndarray) -> np.ndarray:
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+class NodeIndex:
+    """Graf düğümleri üzerinde en yakın düğüm sorguları"""
+
+    def __init__(self, graph):
+        self.node_ids = graph.node_ids
+        self.tree = cKDTree(_unit_vectors(graph.lat, graph.lon)) if graph.num_nodes else None
+
+    def nearest_batch(self, lats, lons) -> Tuple[np.ndarray, np.ndarray]:
+        """Noktalara en yakın düğümlerin OSM kimlikleri ve metre cinsinden uzaklıkları"""
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        if self.tree is None:
+            return np.full(len(lats), -1, dtype=np.int64), np.full(len(lats), np.inf)
+        chord, idx = self.tree.query(_unit_vectors(lats, lons))
+        return self.node_ids[idx], _chord_to_meters(chord)
+
+    def nearest(self, lat: float, lon: float):
+        """Noktaya en yakın düğümün OSM kimliği (graf boşsa None)"""
+        if self.tree is None:
+            return None
+        node_ids, _ = self.nearest_batch([lat], [lon])
+        return int(node_ids[0])
+
+
+def node_index(graph) -> NodeIndex:
+    """Grafa bağlı düğüm indeksini döner (ilk çağrıda kurulur)"""
+    return graph.derived("node_index", lambda: NodeIndex(graph))
+
+
+class EdgeIndex:
+    """Graf kenarları üzerinde en yakın kenar (kenara oturtma) sorguları"""
+
+    def __init__(self, graph):
+        self.projection = graph_projection(graph)
+        src = graph.edge_sources()
+        geom_indptr, geom_lat, geom_lon = graph.geometry
+
+        # Her kenar: kaynak düğüm + ara noktalar + hedef düğüm
+        inner = np.diff(geom_indptr)
+        counts = inner + 2
+        starts = (np.cumsum(counts) - counts).astype(np.int64)
+        node_x, node_y = self.projection.x, self.projection.y
+        x = np.empty(int(counts.sum()))
+        y = np.empty_like(x)
+        x[starts], y[starts] = node_x[src], node_y[src]
+        ends = starts + counts - 1
+        x[ends], y[ends] = node_x[graph.indices], node_y[graph.indices]
+        middle = np.repeat(starts + 1 - geom_indptr[:-1], inner) + np.arange(len(geom_lat))
+        x[middle], y[middle] = self.projection.to_metric(geom_lat, geom_lon)
+
+        self.lines = shapely.linestrings(x, y, indices=np.repeat(np.arange(graph.num_edges), counts))
+        self.tree = shapely.STRtree(self.lines) if graph.num_edges else None
+
+    def snap_batch(self, lats, lons) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Noktaların oturduğu kenarlar (CSR indeksi), kenar boyunca kesirli konum (0-1) ve metre cinsinden dik uzaklık"""
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        edges = np.full(len(lats), -1, dtype=np.int64)
+        offsets = np.zeros(len(lats))
+        distances = np.full(len(lats), np.inf)
+        if self.tree is None or not len(lats):
+            return edges, offsets, distances
+
+        points = shapely.points(*self.projection.to_metric(lats, np.atleast_1d(lons)))
+        (which, hits), hit_distances = self.tree.query_nearest(points, return_distance=True, all_matches=False)
+        edges[which] = hits
+        distances[which] = hit_distances
+        offsets[which] = shapely.line_locate_point(self.lines[hits], points[which], normalized=True)
+        return edges, offsets, distances
+
+    def points_at(self, edges, offsets) -> Tuple[np.ndarray, np.ndarray]:
+        """Kenarlar boyunca kesirli konumlardaki noktaların UTM (x, y) koordinatları"""
+        points = shapely.line_interpolate_point(self.lines[np.asarray(edges, dtype=np.int64)],
+                                                np.asarray(offsets, dtype=np.float64), normalized=True)
+        return shapely.get_x(points), shapely.get_y(points)
+
+
+def edge_snap_index(graph) -> EdgeIndex:
+    """Grafa bağlı kenar indeksini döner (ilk çağrıda kurulur)"""
+    return graph.derived("edge_index", lambda: EdgeIndex(graph))